@@ -0,0 +1,198 @@
+"""Замер скорости генерации актов на синтетических реестрах
+
+Пример:
+    python benchmark.py --sizes 100 1000 --generate-limit 500 --output benchmarks/results.json
+
+Реестры строятся Шаблон.create_aosr_register и кэшируются в benchmarks/registers.
+Каждый размер замеряется в отдельном процессе, чтобы пиковая память (RSS)
+не зависела от предыдущих прогонов. Результаты дописываются в JSON-файл
+списком запусков, что позволяет сравнивать версии между собой.
+"""
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from zipfile import ZipFile
+import openpyxl
+
+BASE_DIR = Path(__file__).parent
+BENCH_DIR = BASE_DIR / 'benchmarks'
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+DEFAULT_TEMPLATE = BASE_DIR / 'data' / 'Шаблон.xlsx'
+
+
+def reference_sizes(acts_count):
+    """Размеры справочников, соразмерные числу актов"""
+    return {
+        'orgs_count': max(10, acts_count // 200),
+        'persons_per_role': max(2, acts_count // 1000),
+        'certs_count': max(15, acts_count // 5),
+        'normatives_count': max(10, min(acts_count // 50, 500)),
+    }
+
+
+def register_path(acts_count):
+    return BENCH_DIR / 'registers' / f"register_{acts_count}.xlsx"
+
+
+def ensure_register(acts_count):
+    """Синтетический реестр заданного размера (строится один раз)"""
+    path = register_path(acts_count)
+    if not path.exists():
+        import Шаблон
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with redirect_stdout(sys.stderr):
+            if not Шаблон.create_aosr_register(path, acts_count=acts_count, dates_as_text=False,
+                                               verbose=False, **reference_sizes(acts_count)):
+                raise RuntimeError(f"Не удалось создать реестр на {acts_count} актов")
+    return path
+
+
+def styles_summary(path):
+    """Размер xl/styles.xml и число записей в его таблицах: не должны расти с числом актов"""
+    if not path.exists():
+        return None
+    with ZipFile(path) as archive:
+        styles = archive.read('xl/styles.xml').decode('utf-8')
+    summary = {'styles_xml_kb': round(len(styles) / 1024, 1)}
+    for tag in ('fonts', 'fills', 'borders', 'cellStyleXfs', 'cellXfs'):
+        match = re.search(rf'<{tag} count="(\d+)"', styles)
+        summary[tag] = int(match.group(1)) if match else 0
+    return summary
+
+
+def run_one(acts_count, template_path, generate_limit, streaming, register_cache=False, clone=False,
+            compression='deflate'):
+    """Один замер в текущем процессе"""
+    from modules.act_processor import ActProcessor
+    from modules.metrics import peak_rss_mb
+
+    path = ensure_register(acts_count)
+    output_path = BENCH_DIR / 'output' / f"akts_{acts_count}.xlsx"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Без кэша реестра замеряется разбор xlsx, с кэшем - повторный запуск
+    processor = ActProcessor(use_cache=register_cache, compression=compression)
+
+    started = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        rows = processor.process_register(path)
+        if generate_limit is not None:
+            rows = rows[:generate_limit]
+        result = processor.generate_all_akts(rows, template_path, output_path, streaming=streaming, clone=clone)
+    total = time.perf_counter() - started
+    metrics = processor.metrics.summary()
+
+    return {
+        'acts_in_register': acts_count,
+        'acts_generated': result.get('success', 0),
+        'status': result['status'],
+        'error': result.get('error'),
+        'streaming': streaming,
+        'clone': clone,
+        'compression': compression,
+        'register_cache': register_cache,
+        'stages': metrics['stages'],
+        'counters': metrics['counters'],
+        'total_seconds': round(total, 3),
+        'per_act_ms': round(total * 1000 / max(len(rows), 1), 2),
+        'peak_rss_mb': peak_rss_mb(),
+        'output_size_mb': round(output_path.stat().st_size / 2**20, 2) if output_path.exists() else None,
+        'styles': styles_summary(output_path),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    """Прогон всех размеров, каждый в отдельном процессе"""
+    results = []
+    for acts_count in args.sizes:
+        print(f"Реестр на {acts_count} актов...", file=sys.stderr)
+        ensure_register(acts_count)
+        command = [sys.executable, __file__, '--run-one', str(acts_count), '--template', str(args.template)]
+        if args.generate_limit is not None:
+            command += ['--generate-limit', str(args.generate_limit)]
+        if args.streaming:
+            command.append('--streaming')
+        if args.register_cache:
+            command.append('--register-cache')
+        if args.clone:
+            command.append('--clone')
+        command += ['--compression', args.compression]
+
+        completed = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
+        if completed.returncode != 0:
+            print(completed.stderr, file=sys.stderr)
+            results.append({'acts_in_register': acts_count, 'status': 'error',
+                            'error': completed.stderr.strip().splitlines()[-1:]})
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+        results.append(result)
+
+    run = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'openpyxl': openpyxl.__version__,
+        'platform': platform.platform(),
+        'template': str(args.template),
+        'results': results,
+    }
+
+    # Файл результатов хранит историю запусков
+    history = []
+    if args.output.exists():
+        history = json.loads(args.output.read_text(encoding='utf-8'))
+    history.append(run)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"Результаты сохранены: {args.output}", file=sys.stderr)
+    return all(result['status'] == 'success' for result in results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замер скорости генерации актов")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Размеры реестров в актах (по умолчанию 100 1000 10000 50000)")
+    parser.add_argument('--template', type=Path, default=DEFAULT_TEMPLATE, help="Шаблон акта")
+    parser.add_argument('--generate-limit', type=int,
+                        help="Генерировать не более N актов (реестр читается целиком)")
+    parser.add_argument('--streaming', action='store_true', help="Потоковая запись книги актов")
+    parser.add_argument('--clone', action='store_true', help="Сборка листов актов из XML листа шаблона")
+    parser.add_argument('--compression', choices=('deflate', 'fast', 'stored'), default='deflate',
+                        help="Сжатие книги актов")
+    parser.add_argument('--register-cache', action='store_true',
+                        help="Читать реестр через дисковый кэш (замер повторного запуска)")
+    parser.add_argument('--output', type=Path, default=BENCH_DIR / 'results.json',
+                        help="JSON-файл с историей замеров")
+    parser.add_argument('--run-one', type=int, metavar='N', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_one is not None:
+        result = run_one(args.run_one, args.template, args.generate_limit, args.streaming, args.register_cache,
+                         args.clone, args.compression)
+        print(json.dumps(result, ensure_ascii=False))
+        return 0 if result['status'] == 'success' else 1
+    return 0 if run_suite(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Генерация актов АОСР из командной строки, без графического интерфейса
+
+Пример:
+    python cli.py Реестр_АОСР.xlsx data/Шаблон.xlsx output/Акты.xlsx --streaming --act АОСР-001
+    python cli.py Реестр_АОСР.xlsx data/Шаблон.xlsx output/Акты --per-act --folders --bundle output/Акты.zip
+    python cli.py Реестр_АОСР.xlsx data/Шаблон.xlsx output/Акты.xlsx --metrics output/metrics.json --profile output/run.prof
+    python cli.py Реестр_АОСР.xlsx data/Шаблон.xlsx output/Акты.xlsx --compression fast
+
+Ход работы выводится в stdout строками JSON (события validation - отчет
+проверки реестра, start, progress, result с замерами этапов в metrics),
+сообщения модулей - в stderr. Код возврата: 0 - все акты созданы,
+1 - ошибка генерации, 3 - часть актов не создана, 130 - прервано.
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import nullcontext, redirect_stdout
+from pathlib import Path
+from config import SAVE_COMPRESSION
+from modules.act_processor import ActProcessor
+from modules.file_manager import COMPRESSION
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_PARTIAL = 3
+EXIT_INTERRUPTED = 130
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация актов скрытых работ (АОСР) по реестру")
+    parser.add_argument('register', type=Path, help="Файл реестра АОСР (.xlsx)")
+    parser.add_argument('template', type=Path, help="Шаблон акта (.xlsx)")
+    parser.add_argument('output', type=Path, help="Книга актов для сохранения (.xlsx) или папка при --per-act")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Число процессов; 0 - по числу ядер (по умолчанию 1)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Потоковая запись листов, память не растет с числом актов")
+    parser.add_argument('--clone', action='store_true',
+                        help="Собирать листы актов из XML листа шаблона (сохраняет параметры печати, быстрее)")
+    parser.add_argument('--compression', choices=sorted(COMPRESSION), default=SAVE_COMPRESSION,
+                        help="Сжатие книг: deflate, fast (быстрый deflate) или stored (без сжатия)")
+    parser.add_argument('--compresslevel', type=int, choices=range(10), metavar='0-9',
+                        help="Уровень deflate, по умолчанию - по режиму сжатия")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Заполнять только акты, изменившиеся с прошлой генерации")
+    parser.add_argument('--per-act', action='store_true',
+                        help="Каждый акт в отдельный файл в папке output")
+    parser.add_argument('--folders', action='store_true',
+                        help="С --per-act: каждый акт в своей папке вместе с сертификатами")
+    parser.add_argument('--certificates', type=Path, metavar='DIR',
+                        help="С --folders: папка с файлами сертификатов (CERT-001.pdf, ...)")
+    parser.add_argument('--bundle', type=Path, metavar='ZIP',
+                        help="С --per-act: собрать файлы актов в zip-архив")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Не использовать кэш разобранного реестра")
+    parser.add_argument('--act', action='append', default=[], metavar='ID',
+                        help="Генерировать только указанные акты: ID или ID-суффикс (можно повторять)")
+    parser.add_argument('--limit', type=int, help="Не более указанного числа актов")
+    parser.add_argument('--progress-every', type=int, default=1, metavar='N',
+                        help="Выводить прогресс каждые N актов (по умолчанию каждый)")
+    parser.add_argument('--metrics', type=Path, metavar='JSON',
+                        help="Сохранить замеры этапов, счетчики и пиковую память в JSON-файл")
+    parser.add_argument('--profile', type=Path, metavar='PROF',
+                        help="Профилировать запуск: cProfile в указанный файл, память в <имя>.memory.txt")
+    args = parser.parse_args(argv)
+    if args.incremental and args.workers != 1:
+        parser.error("--incremental выполняется в одном процессе и несовместим с --workers, отличным от 1")
+    if args.incremental and args.clone:
+        parser.error("--incremental несовместим с --clone: измененные акты заполняются обычным способом")
+    if args.per_act:
+        ignored = [flag for flag, used in (('--streaming', args.streaming), ('--clone', args.clone),
+                                           ('--incremental', args.incremental)) if used]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} не применяется с --per-act")
+    else:
+        ignored = [flag for flag, used in (('--folders', args.folders), ('--certificates', args.certificates),
+                                           ('--bundle', args.bundle)) if used]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} применяется только с --per-act")
+    if args.certificates and not args.folders:
+        parser.error("--certificates применяется только с --folders")
+    return args
+
+
+def emit(event, **data):
+    """Строка JSON с событием в stdout"""
+    print(json.dumps(dict(event=event, **data), ensure_ascii=False, default=str), file=sys.__stdout__, flush=True)
+
+
+def filter_rows(processor, rows, act_ids, limit=None):
+    """Отбор строк реестра по номерам актов"""
+    if act_ids:
+        wanted = set(act_ids)
+        rows = [row for row in rows if str(row.act_id) in wanted or processor.akt_id(row) in wanted]
+    if limit is not None:
+        rows = rows[:limit]
+    return rows
+
+
+def run(args):
+    processor = ActProcessor(use_cache=not args.no_cache, compression=args.compression,
+                             compresslevel=args.compresslevel)
+    timings = {}
+    with processor.metrics.profile(args.profile) if args.profile else nullcontext():
+        code = generate(args, processor, timings)
+    if args.metrics:
+        processor.metrics.save(args.metrics, timings=timings, exit_code=code)
+    return code
+
+
+def generate(args, processor, timings):
+    started = time.perf_counter()
+    stage = time.perf_counter()
+    rows = processor.process_register(args.register)
+    timings['register'] = round(time.perf_counter() - stage, 3)
+
+    emit('validation', **processor.validation_report.as_dict())
+    rows = filter_rows(processor, rows, args.act, args.limit)
+    emit('start', register=args.register, template=args.template, output=args.output, total=len(rows))
+    if not rows:
+        emit('result', status='error', error="Нет актов для генерации", timings=timings,
+             metrics=processor.metrics.summary())
+        return EXIT_ERROR
+
+    def progress(done, total, akt_id, error):
+        if error or done == total or done % args.progress_every == 0:
+            emit('progress', done=done, total=total, act=akt_id, error=error,
+                 elapsed=round(time.perf_counter() - started, 3))
+
+    stage = time.perf_counter()
+    if args.per_act:
+        result = processor.generate_act_files(
+            rows=rows,
+            template_path=args.template,
+            output_dir=args.output,
+            workers=args.workers or None,
+            folders=args.folders,
+            certificates_dir=args.certificates,
+            bundle_path=args.bundle,
+            progress=progress
+        )
+    else:
+        result = processor.generate_all_akts(
+            rows=rows,
+            template_path=args.template,
+            output_path=args.output,
+            streaming=args.streaming,
+            workers=args.workers or None,
+            incremental=args.incremental,
+            clone=args.clone,
+            progress=progress
+        )
+    timings['generate'] = round(time.perf_counter() - stage, 3)
+    timings['total'] = round(time.perf_counter() - started, 3)
+
+    emit('result', timings=timings, metrics=processor.metrics.summary(), **result)
+    if result['status'] != 'success':
+        return EXIT_ERROR
+    if result['success'] < result['total']:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        # Сообщения модулей не должны смешиваться с JSON в stdout
+        with redirect_stdout(sys.stderr):
+            return run(args)
+    except KeyboardInterrupt:
+        emit('result', status='cancelled', error="Прервано")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        emit('result', status='error', error=str(e))
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
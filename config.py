@@ -4,11 +4,23 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / 'data'
 OUTPUT_DIR = BASE_DIR / 'output'
+CACHE_DIR = BASE_DIR / 'cache'
 
 # Создаем папки если их нет
 DATA_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Предельный размер кэша разобранных реестров
+REGISTER_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Предельный размер кэша скомпилированных шаблонов
+TEMPLATE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Сжатие книг актов: 'deflate', 'fast' (deflate уровня 1) или 'stored' (без сжатия);
+# уровень deflate 0-9 задается явно, None - по режиму
+SAVE_COMPRESSION = 'deflate'
+SAVE_COMPRESSLEVEL = None
+
 # Форматы сертификатов
 CERTIFICATE_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png')
 
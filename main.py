@@ -1,18 +1,29 @@
 import sys
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
+from modules.act_files import act_file_name
 from modules.act_processor import ActProcessor
 from modules.file_manager import FileManager
 from config import OUTPUT_DIR
 
 class AktGeneratorGUI:
+    POLL_INTERVAL = 100  # мс между разборами очереди событий
+
     def __init__(self, root):
         self.root = root
         self.processor = ActProcessor()
         self.file_manager = FileManager()
         self.current_output_dir = OUTPUT_DIR
+        # События фонового потока генерации: ('log', текст), ('progress', готово, всего, ID акта),
+        # ('acts', номера актов реестра), ('done', результат), ('failed', текст ошибки)
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
         self.setup_ui()
+        self.root.after(self.POLL_INTERVAL, self._poll_events)
 
     def setup_ui(self):
         """Настройка графического интерфейса"""
@@ -35,14 +46,42 @@ class AktGeneratorGUI:
                  text="Выбрать шаблон акта",
                  command=self.select_template).pack(side=tk.LEFT, padx=5)
         
-        ttk.Button(control_frame,
+        self.generate_button = ttk.Button(control_frame,
                  text="Сгенерировать акты",
-                 command=self.generate_akts).pack(side=tk.LEFT, padx=5)
+                 command=self.generate_akts)
+        self.generate_button.pack(side=tk.LEFT, padx=5)
+        
+        self.cancel_button = ttk.Button(control_frame,
+                 text="Отмена",
+                 command=self.cancel_generation,
+                 state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         
         ttk.Button(control_frame,
                  text="Выбрать папку для сохранения",
                  command=self.select_output_dir).pack(side=tk.LEFT, padx=5)
         
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame,
+                      text="Только измененные акты",
+                      variable=self.incremental_var).pack(side=tk.LEFT, padx=5)
+        
+        self.per_act_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame,
+                      text="Каждый акт в отдельном файле",
+                      variable=self.per_act_var).pack(side=tk.LEFT, padx=5)
+        
+        # Отдельный акт: повторная печать без генерации всего реестра
+        act_frame = ttk.LabelFrame(main_frame, text="Отдельный акт", padding="10")
+        act_frame.pack(fill=tk.X, pady=5)
+        
+        self.akt_combobox = ttk.Combobox(act_frame, state='readonly')
+        self.akt_combobox.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        ttk.Button(act_frame,
+                 text="Сохранить акт",
+                 command=self.save_one_akt).pack(side=tk.LEFT, padx=5)
+        
         # Информация о выбранных файлах
         info_frame = ttk.LabelFrame(main_frame, text="Информация", padding="10")
         info_frame.pack(fill=tk.X, pady=5)
@@ -56,6 +95,10 @@ class AktGeneratorGUI:
         self.output_label = ttk.Label(info_frame, text=f"Папка для сохранения: {self.current_output_dir}")
         self.output_label.pack(anchor=tk.W)
         
+        # Прогресс генерации
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate')
+        self.progress_bar.pack(fill=tk.X, pady=5)
+        
         # Лог выполнения
         self.log_frame = ttk.LabelFrame(main_frame, text="Лог выполнения", padding="10")
         self.log_frame.pack(fill=tk.BOTH, expand=True)
@@ -72,12 +115,43 @@ class AktGeneratorGUI:
         ttk.Label(main_frame, textvariable=self.status_var).pack(side=tk.BOTTOM, fill=tk.X)
 
     def log_message(self, message):
-        """Вывод сообщения в лог"""
+        """Вывод сообщения в лог (можно вызывать из любого потока)"""
+        self.events.put(('log', message))
+
+    def _poll_events(self):
+        """Разбор накопившихся событий генерации по таймеру Tk"""
+        lines = []
+        try:
+            while True:
+                event = self.events.get_nowait()
+                kind = event[0]
+                if kind == 'log':
+                    lines.append(event[1])
+                elif kind == 'acts':
+                    self.akt_combobox['values'] = event[1]
+                elif kind == 'progress':
+                    _, done, total, akt_id = event
+                    self.progress_bar.config(maximum=max(total, 1), value=done)
+                    self.status_var.set(f"Обработано {done}/{total}: акт {akt_id}")
+                elif kind in ('done', 'failed'):
+                    # Завершение показывается после вывода накопленного лога
+                    self._flush_log(lines)
+                    lines = []
+                    self._finish_generation(event)
+        except queue.Empty:
+            pass
+        
+        self._flush_log(lines)
+        self.root.after(self.POLL_INTERVAL, self._poll_events)
+
+    def _flush_log(self, lines):
+        """Вставка пачки строк в лог одной операцией"""
+        if not lines:
+            return
         self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
         self.log_text.config(state='disabled')
         self.log_text.see(tk.END)
-        self.root.update()
 
     def load_register(self):
         """Загрузка файла реестра"""
@@ -113,6 +187,9 @@ class AktGeneratorGUI:
 
     def generate_akts(self):
         """Основная функция генерации актов"""
+        if self.worker is not None and self.worker.is_alive():
+            return
+        
         if not hasattr(self, 'register_path'):
             messagebox.showwarning("Внимание", "Сначала выберите файл реестра АОСР!")
             return
@@ -121,50 +198,161 @@ class AktGeneratorGUI:
             messagebox.showwarning("Внимание", "Сначала выберите шаблон акта!")
             return
     
-        try:
-        # Запрашиваем место сохранения итогового файла
+        if self.per_act_var.get():
+            # Акты сохраняются в папке для сохранения, рядом - архив со всеми актами
+            self.output_path = self.current_output_dir
+        else:
+            # Запрашиваем место сохранения итогового файла
             output_file = filedialog.asksaveasfilename(
                 title="Сохранить книгу актов",
                 defaultextension=".xlsx",
                 filetypes=[("Excel files", "*.xlsx")]
             )
-        
+            
             if not output_file:
                 return
             
-            output_path = Path(output_file)
+            self.output_path = Path(output_file)
+        self.cancel_event.clear()
+        self.progress_bar.config(value=0)
+        self.generate_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.status_var.set("Генерация...")
         
-            self.log_message("\nНачало обработки реестра...")
-            rows = self.processor.process_register(self.register_path)
+        # Генерация идет в фоновом потоке, окно остается отзывчивым
+        self.worker = threading.Thread(
+            target=self._run_generation,
+            args=(self.register_path, self.template_path, self.output_path,
+                  self.incremental_var.get(), self.per_act_var.get()),
+            daemon=True
+        )
+        self.worker.start()
+
+    def save_one_akt(self):
+        """Сохранение выбранного акта в отдельный файл (ActProcessor.render_one)"""
+        if self.worker is not None and self.worker.is_alive():
+            return
+        
+        akt_id = self.akt_combobox.get()
+        if not akt_id:
+            messagebox.showwarning("Внимание", "Сначала сгенерируйте акты и выберите акт!")
+            return
         
+        output_file = filedialog.asksaveasfilename(
+            title=f"Сохранить акт {akt_id}",
+            initialdir=self.current_output_dir,
+            initialfile=act_file_name(akt_id, set()),
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx")]
+        )
+        if not output_file:
+            return
+        
+        try:
+            data = self.processor.render_one(akt_id, self.template_path)
+            self.file_manager.write_file_safe(Path(output_file), lambda f: f.write(data))
+            self.log_message(f"Акт {akt_id} сохранен: {output_file}")
+        except Exception as e:
+            self.log_message(f"Ошибка при сохранении акта {akt_id}: {e}")
+            messagebox.showerror("Ошибка", str(e))
+
+    def cancel_generation(self):
+        """Остановка генерации после текущего акта"""
+        self.cancel_event.set()
+        self.cancel_button.config(state='disabled')
+        self.log_message("Отмена генерации...")
+
+    def _run_generation(self, register_path, template_path, output_path, incremental, per_act):
+        """Чтение реестра и генерация актов (выполняется в фоновом потоке)"""
+        try:
+            self.log_message("\nНачало обработки реестра...")
+            self.processor.metrics.reset()
+            rows = self.processor.process_register(register_path)
+            for line in self.processor.validation_report.lines(self.processor.REPORT_LINES):
+                self.log_message(line)
+            
             if not rows:
-                messagebox.showinfo("Информация", "Реестр не содержит данных для обработки")
+                self.events.put(('done', None))
                 return
-        
+            
             self.log_message(f"Найдено актов для обработки: {len(rows)}")
-        
-        # Генерация всех актов в одной книге
-            result = self.processor.generate_all_akts(
-                rows=rows,
-                template_path=self.template_path,
-                output_path=output_path
-            )
-        
-            if result['status'] == 'success':
-                self.log_message("\n" + "="*50)
-                self.log_message(f"ГЕНЕРАЦИЯ ЗАВЕРШЕНА\nУспешно создано: {result['success']}/{result['total']}")
-                self.log_message(f"Результат сохранен в: {output_path}")
-                self.status_var.set(f"Готово. Успешно создано {result['success']} актов")
+            self.events.put(('acts', [self.processor.akt_id(row) for row in rows]))
             
-                messagebox.showinfo("Завершено", 
-                              f"Обработка завершена.\nУспешно создано актов: {result['success']}/{result['total']}\n\nФайл сохранен:\n{output_path}")
+            if per_act:
+                # Каждый акт в своей папке, все папки - в одном архиве
+                result = self.processor.generate_act_files(
+                    rows=rows,
+                    template_path=template_path,
+                    output_dir=output_path,
+                    workers=None,
+                    folders=True,
+                    bundle_path=output_path / f"Акты_{Path(register_path).stem}.zip",
+                    progress=self._report_progress,
+                    cancel_event=self.cancel_event
+                )
             else:
-                self.log_message(f"\nОшибка: {result['error']}")
-                messagebox.showerror("Ошибка", f"Произошла ошибка:\n{result['error']}")
+                # Генерация всех актов в одной книге
+                result = self.processor.generate_all_akts(
+                    rows=rows,
+                    template_path=template_path,
+                    output_path=output_path,
+                    incremental=incremental,
+                    progress=self._report_progress,
+                    cancel_event=self.cancel_event
+                )
+            for line in self.processor.metrics.lines():
+                self.log_message(line)
+            self.events.put(('done', result))
             
         except Exception as e:
-            self.log_message(f"\nОшибка: {str(e)}")
-            messagebox.showerror("Ошибка", f"Произошла ошибка:\n{str(e)}")
+            self.events.put(('failed', str(e)))
+
+    def _report_progress(self, done, total, akt_id, error):
+        """Передача прогресса из фонового потока в очередь событий"""
+        if error:
+            self.log_message(f"Ошибка при обработке акта {akt_id}: {error}")
+        self.events.put(('progress', done, total, akt_id))
+
+    def _finish_generation(self, event):
+        """Вывод результата генерации в главном потоке"""
+        self.generate_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+        kind, result = event
+        output_path = self.output_path
+        
+        if kind == 'failed':
+            self._flush_log([f"\nОшибка: {result}"])
+            self.status_var.set("Ошибка генерации")
+            messagebox.showerror("Ошибка", f"Произошла ошибка:\n{result}")
+            
+        elif result is None:
+            self.status_var.set("Готов к работе")
+            messagebox.showinfo("Информация", "Реестр не содержит данных для обработки")
+            
+        elif result['status'] == 'success':
+            lines = ["\n" + "="*50,
+                     f"ГЕНЕРАЦИЯ ЗАВЕРШЕНА\nУспешно создано: {result['success']}/{result['total']}"]
+            if 'reused' in result:
+                lines.append(f"Заполнено заново: {result['rendered']}, перенесено без изменений: {result['reused']}, "
+                             f"удалено: {result['removed']}")
+            if result.get('bundle'):
+                lines.append(f"Архив актов: {result['bundle']}")
+            lines.append(f"Результат сохранен в: {output_path}")
+            self._flush_log(lines)
+            self.status_var.set(f"Готово. Успешно создано {result['success']} актов")
+            
+            messagebox.showinfo("Завершено", 
+                          f"Обработка завершена.\nУспешно создано актов: {result['success']}/{result['total']}\n\nФайл сохранен:\n{output_path}")
+            
+        elif result['status'] == 'cancelled':
+            self._flush_log(["Генерация отменена, файл не сохранен"])
+            self.status_var.set("Генерация отменена")
+            
+        else:
+            self._flush_log([f"\nОшибка: {result['error']}"])
+            self.status_var.set("Ошибка генерации")
+            messagebox.showerror("Ошибка", f"Произошла ошибка:\n{result['error']}")
+
 def main():
     try:
         # Создаем папку для результатов если ее нет
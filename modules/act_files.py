@@ -0,0 +1,177 @@
+import os
+import re
+import shutil
+from pathlib import Path
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+from config import CERTIFICATE_EXTENSIONS
+from modules.parallel import _render_files, worker_pool
+
+# Символы, недопустимые в именах файлов Windows
+_UNSAFE_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# Уже сжатые форматы кладутся в архив без повторного сжатия
+_STORED_SUFFIXES = {'.xlsx', '.zip', '.pdf', '.jpg', '.jpeg', '.png'}
+
+# Актов в одном задании рабочему процессу
+BATCH_SIZE = 20
+
+
+def act_file_name(akt_id, used):
+    """Имя файла акта без недопустимых символов, не совпадающее с уже занятыми"""
+    stem = _UNSAFE_CHARS.sub('_', f"Акт {akt_id}").strip(' .') or "Акт"
+    candidate = stem
+    counter = 1
+    while candidate.lower() in used:
+        counter += 1
+        candidate = f"{stem} ({counter})"
+    used.add(candidate.lower())
+    return candidate + '.xlsx'
+
+
+def certificate_index(certificates_dir):
+    """Файлы сертификатов папки по первому слову имени: CERT-001 Бетон.pdf -> cert-001"""
+    index = {}
+    if certificates_dir:
+        for path in sorted(Path(certificates_dir).iterdir()):
+            if path.is_file() and path.suffix.lower() in CERTIFICATE_EXTENSIONS:
+                index.setdefault(path.stem.split()[0].lower(), []).append(path)
+    return index
+
+
+def find_certificates(row, certificates, index):
+    """Файлы сертификатов материалов акта по ID сертификата или его номеру"""
+    if not index or not row.materials:
+        return []
+
+    found = []
+    for cert_id in str(row.materials).split(';'):
+        cert_id = cert_id.strip()
+        if not cert_id:
+            continue
+        matches = index.get(cert_id.lower())
+        cert = certificates.get(cert_id)
+        if not matches and cert and cert.number:
+            matches = index.get(str(cert.number).lower())
+        if not matches:
+            print(f"Файл сертификата {cert_id} не найден")
+            continue
+        found.extend(matches)
+    return found
+
+
+class ActFilesWriter:
+    """Вывод каждого акта в отдельную книгу xlsx
+
+    Акты сохраняются в output_dir (при folders=True - каждый в своей папке
+    вместе с файлами сертификатов), при workers > 1 - в нескольких процессах.
+    Готовые файлы по мере появления дописываются в zip-архив bundle_path.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.file_manager = processor.file_manager
+
+    def generate(self, rows, template_path, output_dir, workers=1, folders=False, certificates_dir=None,
+                 bundle_path=None, progress=None, cancel_event=None):
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.processor.prepare_signatories(rows)
+
+        jobs = self._plan(rows, output_dir, folders)
+        batches = [jobs[start:start + BATCH_SIZE] for start in range(0, len(jobs), BATCH_SIZE)]
+        workers = workers or os.cpu_count() or 1
+
+        certificates = certificate_index(certificates_dir) if folders else {}
+        # Архив собирается во временном файле и заменяет прежний только после успешной генерации
+        bundle_temp = Path(bundle_path).with_name(f"temp_{Path(bundle_path).name}") if bundle_path else None
+        bundle = ZipFile(bundle_temp, 'w', ZIP_DEFLATED, allowZip64=True) if bundle_path else None
+        files = []
+        try:
+            if workers > 1 and len(batches) > 1:
+                # Пачки раздаются процессам по мере освобождения, результаты принимаются по порядку
+                executor = worker_pool(self.processor, template_path, min(workers, len(batches)))
+                try:
+                    results = (self._merge(result) for result in executor.map(_render_files, batches))
+                    self._collect(results, batches, rows, output_dir, certificates,
+                                  bundle, files, progress, cancel_event)
+                finally:
+                    # При отмене еще не начатые пачки снимаются с очереди
+                    executor.shutdown(wait=True, cancel_futures=True)
+            else:
+                template = self.processor.load_template(template_path)
+                results = (self._render_batch(batch, template) for batch in batches)
+                self._collect(results, batches, rows, output_dir, certificates,
+                              bundle, files, progress, cancel_event)
+            if bundle is not None:
+                bundle.close()
+                os.replace(bundle_temp, bundle_path)
+        finally:
+            if bundle is not None:
+                bundle.close()
+                if bundle_temp.exists():
+                    bundle_temp.unlink()
+
+        return {
+            'dir': output_dir,
+            'files': files,
+            'bundle': bundle_path,
+            'total': len(rows),
+            'success': len(files),
+            'status': 'success'
+        }
+
+    def _plan(self, rows, output_dir, folders):
+        """Пути файлов актов: [(строка реестра, путь xlsx)]; папки актов создаются при сохранении"""
+        jobs = []
+        used = set()
+        for row in rows:
+            akt_id = self.processor.akt_id(row)
+            file_name = act_file_name(akt_id, used)
+            if folders:
+                folder = self.file_manager.akt_folder_path(Path(file_name).stem[4:], output_dir)
+                jobs.append((row, folder / file_name))
+            else:
+                jobs.append((row, output_dir / file_name))
+        return jobs
+
+    def _merge(self, result):
+        """Пути файлов пачки рабочего процесса; его замеры добавляются к замерам процессора"""
+        files, metrics = result
+        self.processor.metrics.merge(metrics)
+        return files
+
+    def _render_batch(self, batch, template):
+        return [path for row, path in batch if self.processor.render_file(row, template, path)]
+
+    def _collect(self, results, batches, rows, output_dir, certificates,
+                 bundle, files, progress, cancel_event):
+        """Прием готовых пачек: сертификаты, архив, прогресс, отмена"""
+        from modules.act_processor import GenerationCancelled
+
+        done = 0
+        results = iter(results)
+        for batch in batches:
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled()
+
+            created = set(next(results))
+            for row, path in batch:
+                done += 1
+                if path not in created:
+                    if progress:
+                        progress(done, len(rows), self.processor.akt_id(row), "файл акта не создан")
+                    continue
+
+                files.append(path)
+                act_files = [path]
+                if certificates:
+                    for cert_path in find_certificates(row, self.processor.certificates, certificates):
+                        target = path.parent / cert_path.name
+                        shutil.copy2(cert_path, target)
+                        act_files.append(target)
+                if bundle is not None:
+                    for act_file in act_files:
+                        compress = ZIP_STORED if act_file.suffix.lower() in _STORED_SUFFIXES else ZIP_DEFLATED
+                        bundle.write(act_file, act_file.relative_to(output_dir).as_posix(), compress_type=compress)
+                if progress:
+                    progress(done, len(rows), self.processor.akt_id(row), None)
@@ -1,276 +1,605 @@
 import openpyxl
-from openpyxl.utils import get_column_letter
-from copy import copy
+from collections import OrderedDict
+from contextlib import suppress
+from io import BytesIO
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile
 from datetime import datetime
-from modules.file_manager import FileManager
+from config import (CACHE_DIR, REGISTER_CACHE_MAX_BYTES, SAVE_COMPRESSION, SAVE_COMPRESSLEVEL,
+                    TEMPLATE_CACHE_MAX_BYTES)
+from modules.act_files import ActFilesWriter
+from modules.file_manager import FileManager, SaveError
+from modules.fill_plan import FillPlan, fill_plan_path
+from modules.incremental import IncrementalGenerator, manifest_path
+from modules.metrics import Metrics
+from modules.package import unique_title, write_book
+from modules.parallel import generate_parallel
+from modules.records import parse_date
+from modules.register import Register, RegisterReader
+from modules.register_cache import RegisterCache
+from modules.sheet_xml import SheetXmlTemplate, TemplateXmlError
+from modules.streaming import StreamingActBook
+from modules.template import TemplateStamp
+from modules.template_cache import TemplateCache
+from modules.validation import RegisterValidator, ValidationReport
+
+
+class GenerationCancelled(Exception):
+    """Генерация остановлена пользователем"""
+
 
 class ActProcessor:
-    def __init__(self):
-        self.file_manager = FileManager()
+    # Подписанты акта: причастность в Персоналиях и тип организации;
+    # ячейки подписантов задаются в разметке шаблона (FillPlan)
+    SIGNATORIES = (
+        ('Заказчик', 'Заказчик'),
+        ('Генподрядчик', 'Генподрядчик'),
+        ('Технадзор', 'Технадзор'),
+        ('Проектировщик', 'Проектировщик'),
+        ('Исполнитель работ', 'Подрядчик'),
+    )
+    # Поля записи акта с ID представителей, в порядке SIGNATORIES
+    SIGNATORY_FIELDS = ('customer_rep', 'general_contractor_rep', 'supervisor_rep', 'designer_rep', 'contractor_rep')
+    # Версия заполнения листа; меняется при правке _fill_akt_data или FillPlan,
+    # чтобы инкрементальная генерация перезаполнила все акты
+    RENDER_VERSION = 4
+    # Сколько замечаний проверки реестра выводить в журнал
+    REPORT_LINES = 20
+    # Сколько готовых книг отдельных актов хранить для повторного просмотра и печати (render_one)
+    RENDERED_CACHE_SIZE = 32
+
+    def __init__(self, use_cache=True, compression=SAVE_COMPRESSION, compresslevel=SAVE_COMPRESSLEVEL):
+        # Замеры этапов и счетчики запуска (summary, lines, save)
+        self.metrics = Metrics()
+        self.file_manager = FileManager(self.metrics, compression, compresslevel)
+        self.register_reader = RegisterReader(self.file_manager)
+        # Разобранные реестры кэшируются на диске, повторное чтение не открывает xlsx
+        self.register_cache = RegisterCache(CACHE_DIR, REGISTER_CACHE_MAX_BYTES, self.file_manager) if use_cache else None
+        # Скомпилированные шаблоны тоже кэшируются, в том числе для рабочих процессов
+        self.template_cache = TemplateCache(CACHE_DIR, TEMPLATE_CACHE_MAX_BYTES, self.file_manager) if use_cache else None
+        self.register = Register()
+        self.validation_report = ValidationReport()
         self.organizations = {}
         self.personnel = {}
         self.normatives = {}
         self.certificates = {}
+        self.organizations_by_type = {}
+        self.organizations_by_name = {}
+        self.personnel_by_role = {}
+        self._signatory_cache = {}
+        self._role_cache = {}
+        self._signatory_warnings = set()
+        # Строки реестра по номеру акта, разобранный шаблон и готовые книги для render_one
+        self.acts_by_id = {}
+        self._warm_template = None
+        self._rendered = OrderedDict()
 
     def load_source_data(self, register_path):
         """Загрузка всех данных из реестра АОСР"""
-        wb = self.file_manager.load_workbook_safe(register_path)
-        
-        # Загрузка организаций
-        org_sheet = wb['Организации']
-        for row in org_sheet.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Проверяем, что есть ID организации
-                self.organizations[row[0]] = {
-                    'type': row[1],
-                    'name': row[2],
-                    'ogrn': row[3],
-                    'inn': row[4],
-                    'address': row[5],
-                    'phone': row[6],
-                    'sro': row[7]
-                }
-        
-        # Загрузка персоналий
-        pers_sheet = wb['Персоналии']
-        for row in pers_sheet.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Проверяем, что есть ID персоналии
-                self.personnel[row[0]] = {
-                    'name': row[1],
-                    'position': row[2],
-                    'organization': row[3],
-                    'role': row[4],
-                    'phone': row[5],
-                    'nrs': row[6],
-                    'order': row[7],
-                    'active_from': row[8]
-                }
-        
-        # Загрузка нормативов
-        norms_sheet = wb['Нормативы']
-        for row in norms_sheet.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Проверяем, что есть код норматива
-                self.normatives[row[0]] = {
-                    'name': row[1],
-                    'type': row[2],
-                    'full_name': row[3],
-                    'status': row[4]
-                }
-        
-        # Загрузка сертификатов
-        cert_sheet = wb['Сертификаты']
-        for row in cert_sheet.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Проверяем, что есть ID сертификата
-                self.certificates[row[0]] = {
-                    'material': row[1],
-                    'cert_number': row[2],
-                    'full_info': row[3],
-                    'manufacturer': row[4]
-                }
-        
-        wb.close()
+        with self.metrics.stage('load'):
+            if self.register_cache is not None:
+                return self.use_register(self.register_cache.load(register_path, self.register_reader.read))
+            return self.use_register(self.register_reader.read(register_path))
+
+    def use_register(self, register):
+        """Подключение уже прочитанного реестра"""
+        self.register = register
+        self.organizations = self.register.organizations
+        self.personnel = self.register.personnel
+        self.normatives = self.register.normatives
+        self.certificates = self.register.certificates
+        self._build_indexes()
+        self._signatory_cache = {}
+        self._role_cache = {}
+        self._signatory_warnings = set()
+        self._rendered.clear()
+        return self.register
 
     def process_register(self, register_path):
-        """Обработка реестра актов"""
-        self.load_source_data(register_path)
+        """Обработка реестра актов
+
+        Все строки проверяются целиком (RegisterValidator), к генерации
+        передаются строки без ошибок. Полный отчет - в self.validation_report.
+        """
+        register = self.load_source_data(register_path)
         
-        wb = self.file_manager.load_workbook_safe(register_path)
-        sheet = wb['Реестр актов']
+        with self.metrics.stage('validate'):
+            valid_rows, self.validation_report = RegisterValidator(register).validate()
+        self.metrics.count('rows', len(register.rows))
+        if self.validation_report.problems:
+            for line in self.validation_report.lines(self.REPORT_LINES):
+                print(line)
         
-        valid_rows = []
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            if self.validate_row(row):
-                valid_rows.append(row)
-            elif any(cell is not None for cell in row):
-                break  # Прекращаем при первой частично заполненной строке
-                
-        wb.close()
+        self.index_acts(valid_rows)
         return valid_rows
 
-    def validate_row(self, row):
-        """Проверка валидности строки реестра"""
-        if not isinstance(row, (list, tuple)):
-            return False
-        
-        if all(cell is None for cell in row):
-            return False
-        
-        if len(row) < 7:
-            return False
-        
-        if not (row[0] and row[5] and isinstance(row[5], datetime)):
-            return False
-        
-        return True
+    def index_acts(self, rows):
+        """Индекс строк по номеру акта: ID-суффикс, ID и суффикс-номер
+
+        Полный номер важнее краткого: ID или суффикс-номер, совпавший с полным
+        номером другого акта, ведет к тому акту. При повторе номера остается
+        первая строка; строка без суффикса или номера ключа суффикс-номер не получает.
+        """
+        self.acts_by_id = {}
+        for key in (self.akt_id, lambda row: row.act_id, self._suffix_number):
+            for row in rows:
+                value = key(row)
+                if value is not None:
+                    self.acts_by_id.setdefault(str(value), row)
+        self._rendered.clear()
+
+    @staticmethod
+    def _suffix_number(row):
+        """Краткий номер акта: суффикс-номер; None, если одного из них нет"""
+        if row.suffix is None or row.number is None:
+            return None
+        return f"{row.suffix}-{row.number}"
+
+    def find_act(self, act_id):
+        """Строка реестра по номеру акта (None, если акта нет)"""
+        return self.acts_by_id.get(str(act_id).strip())
+
+    def load_template(self, template_path):
+        """Загрузка и компиляция шаблона акта вместе с его разметкой"""
+        with self.metrics.stage('template'):
+            if self.template_cache is not None:
+                template = self.template_cache.load(template_path, self._compile_template)
+            else:
+                template = self._compile_template(template_path)
+            
+            template.fill_plan = FillPlan.load(
+                fill_plan_path(template_path),
+                template.anchors,
+                roles=[role for role, _ in self.SIGNATORIES],
+                computed={'akt_id': self.akt_id, 'attachments': self.attachments}
+            )
+            return template
+
+    def _compile_template(self, template_path):
+        """Разбор файла шаблона (при промахе кэша шаблонов)"""
+        with self.metrics.stage('template_compile'):
+            wb_template = self.file_manager.load_workbook_safe(template_path)
+            try:
+                return TemplateStamp(wb_template.active)
+            finally:
+                wb_template.close()
+
+    def generate_all_akts(self, rows, template_path, output_path, streaming=False, workers=1, incremental=False,
+                          clone=False, progress=None, cancel_event=None):
+        """Генерация всех актов в одной книге
 
-    def generate_all_akts(self, rows, template_path, output_path):
-        """Генерация всех актов в одной книге"""
+        При streaming=True каждый лист записывается в пакет xlsx сразу после
+        заполнения и освобождается, поэтому расход памяти не растет с числом актов.
+        При workers > 1 (или None - по числу ядер) строки делятся на части,
+        которые заполняются в отдельных процессах и сохраняются в файлы
+        <имя>_01.xlsx, <имя>_02.xlsx, ... в порядке реестра.
+        При incremental=True заполняются только акты, изменившиеся с прошлой
+        генерации в тот же файл, остальные листы переносятся из него; такая
+        генерация идет в одном процессе, с workers != 1 - ValueError.
+        При clone=True листы актов собираются из XML листа шаблона
+        (render_cloned_book); если шаблон этого не допускает, книга
+        строится обычным способом.
+        progress(done, total, akt_id, error) вызывается после каждого акта,
+        установленный cancel_event (threading.Event) прерывает генерацию
+        без сохранения книги.
+        """
+        if incremental and workers != 1:
+            raise ValueError("Инкрементальная генерация выполняется в одном процессе (workers=1)")
+        if not incremental:
+            # Книга пишется целиком, манифест прошлой инкрементальной генерации к ней больше не относится
+            with suppress(FileNotFoundError):
+                manifest_path(output_path).unlink()
+        if workers is None or workers > 1:
+            return generate_parallel(self, rows, template_path, output_path, streaming, workers, clone,
+                                     progress, cancel_event)
+        
         try:
+            if incremental:
+                self.prepare_signatories(rows)
+                return IncrementalGenerator(self).generate(rows, template_path, output_path, streaming,
+                                                           progress, cancel_event)
+            
             # Загружаем шаблон
-            wb_template = self.file_manager.load_workbook_safe(template_path)
-            template_sheet = wb_template.active
+            template = self.load_template(template_path)
+            
+            sheet_xml = None
+            if clone:
+                try:
+                    sheet_xml = SheetXmlTemplate.load(template_path, template.fill_plan)
+                except TemplateXmlError as e:
+                    print(f"Шаблон нельзя размножить на уровне XML ({e}), книга строится обычным способом")
+            
+            if sheet_xml is not None:
+                rendered = self.render_cloned_book(rows, template_path, sheet_xml, template.fill_plan, output_path,
+                                                   progress, cancel_event)
+            else:
+                rendered = self.render_book(rows, template, output_path, streaming, progress, cancel_event)
             
-            # Создаем новую книгу для всех актов
+            if not rendered:
+                return {
+                    'file': output_path,
+                    'error': "Ни один акт не удалось заполнить",
+                    'status': 'error'
+                }
+            return {
+                'file': output_path,
+                'total': len(rows),
+                'success': len(rendered),
+                'status': 'success'
+            }
+            
+        except GenerationCancelled:
+            return {
+                'file': output_path,
+                'error': "Генерация отменена",
+                'status': 'cancelled'
+            }
+            
+        except Exception as e:
+            return {
+                'file': output_path,
+                'error': str(e),
+                'status': 'error'
+            }
+
+    def generate_act_files(self, rows, template_path, output_dir, workers=1, folders=False, certificates_dir=None,
+                           bundle_path=None, progress=None, cancel_event=None):
+        """Генерация каждого акта в отдельный файл
+
+        Файлы "Акт <номер>.xlsx" сохраняются в output_dir, при folders=True -
+        в папках актов (FileManager.akt_folder_path) вместе с файлами
+        сертификатов из certificates_dir. При workers > 1 (или None - по числу
+        ядер) акты сохраняются в нескольких процессах. bundle_path - zip-архив,
+        в который готовые файлы дописываются по мере создания.
+        """
+        try:
+            return ActFilesWriter(self).generate(rows, template_path, output_dir, workers, folders,
+                                                 certificates_dir, bundle_path, progress, cancel_event)
+            
+        except GenerationCancelled:
+            return {
+                'dir': output_dir,
+                'error': "Генерация отменена",
+                'status': 'cancelled'
+            }
+            
+        except Exception as e:
+            return {
+                'dir': output_dir,
+                'error': str(e),
+                'status': 'error'
+            }
+
+    def render_book(self, rows, template, output_path, streaming=False, progress=None, cancel_event=None,
+                    intermediate=False):
+        """Заполнение книги актов по скомпилированному шаблону и ее сохранение
+
+        Возвращает индексы строк, листы которых созданы, в порядке листов книги:
+        лист акта, который не удалось заполнить, удаляется, а если не заполнен
+        ни один акт, книга не сохраняется.
+        При установленном cancel_event выбрасывает GenerationCancelled, книга не сохраняется;
+        при ошибке записи файла - SaveError. intermediate - книга нужна только для
+        переноса листов в другую и сохраняется без сжатия.
+        """
+        # Создаем новую книгу для всех актов
+        if streaming:
+            output_book = StreamingActBook()
+            output_wb = output_book.workbook
+        else:
             output_wb = openpyxl.Workbook()
             output_wb.remove(output_wb.active)  # Удаляем дефолтный лист
+        
+        metrics = self.metrics
+        try:
+            self.prepare_signatories(rows)
             
-            success_count = 0
-            for row in rows:
-                akt_id = f"{row[0]}-{row[1]}"
+            rendered = []
+            for index, row in enumerate(rows):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled()
+                
+                akt_id = self.akt_id(row)
+                error = None
+                new_sheet = None
                 
                 try:
                     # Создаем новый лист для акта
                     sheet_name = f"Акт {akt_id}"[:31]  # Ограничение длины имени листа
-                    new_sheet = output_wb.create_sheet(title=sheet_name)
+                    if streaming:
+                        new_sheet = output_book.new_sheet(sheet_name)
+                    else:
+                        new_sheet = output_wb.create_sheet(title=sheet_name)
                     
                     # Копируем шаблон
-                    self._copy_template(template_sheet, new_sheet)
+                    with metrics.stage('copy'):
+                        self._copy_template(template, new_sheet)
                     
                     # Заполняем данные
-                    self._fill_akt_data(new_sheet, row)
+                    with metrics.stage('fill'):
+                        cells = self._fill_akt_data(new_sheet, row, template.fill_plan)
+                    metrics.count('cells', cells)
                     
-                    success_count += 1
+                    if streaming:
+                        with metrics.stage('flush'):
+                            output_book.flush(new_sheet)
+                    
+                    rendered.append(index)
                     
                 except Exception as e:
-                    print(f"Ошибка при обработке акта {akt_id}: {str(e)}")
-                    continue
+                    error = str(e)
+                    print(f"Ошибка при обработке акта {akt_id}: {error}")
+                    # Недозаполненный лист в книгу не попадает; в потоковой книге
+                    # черновой лист без flush и так не записывается
+                    if new_sheet is not None and not streaming:
+                        output_wb.remove(new_sheet)
+                
+                if progress:
+                    progress(index + 1, len(rows), akt_id, error)
             
-            # Сохраняем файл со всеми актами
-            self.file_manager.save_workbook_safe(output_wb, output_path)
+            metrics.count('acts', len(rendered))
+            metrics.count('styles', len(output_wb._cell_styles))
             
-            return {
-                'file': output_path,
-                'total': len(rows),
-                'success': success_count,
-                'status': 'success'
-            }
-            
-        except Exception as e:
-            return {
-                'file': output_path,
-                'error': str(e),
-                'status': 'error'
-            }
+            # Сохраняем файл со всеми актами; книга без листов не сохраняется
+            if rendered:
+                self.file_manager.save_workbook_safe(output_wb, output_path, intermediate=intermediate)
+            return rendered
         finally:
-            if 'wb_template' in locals():
-                wb_template.close()
-            if 'output_wb' in locals():
-                output_wb.close()
+            output_wb.close()
 
-    def _copy_template(self, template_sheet, new_sheet):
-        """Копирование шаблона с сохранением стилей"""
-        # Копируем объединенные ячейки
-        for merged_range in template_sheet.merged_cells.ranges:
-            new_sheet.merge_cells(str(merged_range))
-        
-        # Копируем размеры столбцов
-        for col in template_sheet.columns:
-            col_letter = get_column_letter(col[0].column)
-            if col_letter in template_sheet.column_dimensions:
-                new_sheet.column_dimensions[col_letter].width = template_sheet.column_dimensions[col_letter].width
+    def render_cloned_book(self, rows, template_path, sheet_xml, plan, output_path, progress=None, cancel_event=None):
+        """Книга актов из пакета шаблона: XML каждого листа - копия листа шаблона с записанными ячейками
+
+        Стили, тема, параметры печати и связи книги берутся из шаблона как есть.
+        Возвращает индексы строк, листы которых созданы, в порядке листов книги;
+        если не заполнен ни один акт, файл книги удаляется.
+        """
+        metrics = self.metrics
+        self.prepare_signatories(rows)
+        rendered = []
         
-        # Копируем высоты строк
-        for row_idx, row_dim in template_sheet.row_dimensions.items():
-            new_sheet.row_dimensions[row_idx].height = row_dim.height
+        def render(index, row, akt_id):
+            """XML листа акта; None - акт не удалось заполнить"""
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled()
+            data = error = None
+            try:
+                with metrics.stage('fill'):
+                    values = self._sheet_values(row, plan)
+                with metrics.stage('clone'):
+                    data = sheet_xml.render(values)
+                metrics.count('cells', len(values))
+                rendered.append(index)
+            except Exception as e:
+                error = str(e)
+                print(f"Ошибка при обработке акта {akt_id}: {error}")
+            if progress:
+                progress(index + 1, len(rows), akt_id, error)
+            return data
         
-        # Копируем ячейки с сохранением стилей
-        for row in template_sheet.iter_rows():
-            for cell in row:
-                if isinstance(cell, openpyxl.cell.cell.MergedCell):
-                    continue
-                    
-                new_cell = new_sheet[cell.coordinate]
-                new_cell.value = cell.value
-                
-                if cell.has_style:
-                    new_cell.font = copy(cell.font)
-                    new_cell.border = copy(cell.border)
-                    new_cell.fill = copy(cell.fill)
-                    new_cell.number_format = cell.number_format
-                    new_cell.protection = copy(cell.protection)
-                    new_cell.alignment = copy(cell.alignment)
-
-    def _fill_akt_data(self, sheet, row):
-        """Заполнение данных акта в шаблоне"""
-        # Основные данные акта
-        self._write_to_cell(sheet, 'C8', f"{row[0]}-{row[1]}")  # Номер акта
-        self._write_to_cell(sheet, 'K8', row[5].day)  # День акта
-        self._write_to_cell(sheet, 'O8', row[5].month)  # Месяц акта
-        self._write_to_cell(sheet, 'S8', row[5].year)  # Год акта
+        used_titles = set()
+        sheets = []
+        with ZipFile(template_path) as template:
+            for index, row in enumerate(rows):
+                akt_id = self.akt_id(row)
+                title = unique_title(f"Акт {akt_id}", used_titles)
+                sheets.append((title, template, sheet_xml.part,
+                               lambda index=index, row=row, akt_id=akt_id: render(index, row, akt_id)))
+            
+            # Книга пишется во временный файл и заменяет прежнюю только целиком
+            zip_options = self.file_manager.zip_options()
+            self.file_manager.write_file_safe(output_path, lambda f: write_book(f, template, sheets, **zip_options))
         
-        # Наименование работ
-        self._write_to_cell(sheet, 'A45', row[3])  # Наименование работ
+        # Ни один акт не заполнен - книга без листов не нужна
+        if not rendered:
+            Path(output_path).unlink()
+        metrics.count('acts', len(rendered))
+        return rendered
+
+    def _sheet_values(self, row, plan):
+        """Значения ячеек листа акта по разметке: {(строка, столбец): значение}"""
+        return {(row_idx, col_idx): value for row_idx, col_idx, value in plan.values(row, self._signatory_values(row))}
+
+    def render_one(self, act_id, template_path):
+        """Книга xlsx (bytes) с одним актом - для просмотра или повторной печати
+
+        Акт ищется по индексу номеров (find_act), шаблон разбирается один раз
+        и держится в памяти до изменения файла. Лист собирается из XML листа
+        шаблона (как при clone=True), если шаблон этого не допускает - через
+        openpyxl. Последние RENDERED_CACHE_SIZE книг хранятся готовыми.
+        Если акта нет в реестре - KeyError.
+        """
+        row = self.find_act(act_id)
+        if row is None:
+            raise KeyError(f"Акт {act_id} не найден в реестре")
+        template, sheet_xml, package = self._load_warm_template(template_path)
         
-        # Даты выполнения работ
-        start_date = row[4]  # Дата начала
-        end_date = row[5]  # Дата окончания
-        self._write_to_cell(sheet, 'K56', start_date.day if start_date else "")
-        self._write_to_cell(sheet, 'O56', start_date.month if start_date else "")
-        self._write_to_cell(sheet, 'S56', start_date.year if start_date else "")
-        self._write_to_cell(sheet, 'K57', end_date.day if end_date else "")
-        self._write_to_cell(sheet, 'O57', end_date.month if end_date else "")
-        self._write_to_cell(sheet, 'S57', end_date.year if end_date else "")
+        akt_id = self.akt_id(row)
+        data = self._rendered.get(akt_id)
+        if data is not None:
+            self._rendered.move_to_end(akt_id)
+            self.metrics.count('rendered_cache_hits')
+            return data
         
-        # Проектная документация
-        self._write_to_cell(sheet, 'A49', f"Проект: {row[11]}, Лист: {row[12]}")  # Проект и лист
+        with self.metrics.stage('render_one'):
+            if sheet_xml is not None:
+                sheet = sheet_xml.render(self._sheet_values(row, template.fill_plan))
+                title = unique_title(f"Акт {akt_id}", set())
+                buffer = BytesIO()
+                with ZipFile(BytesIO(package)) as base:
+                    write_book(buffer, base, [(title, base, sheet_xml.part, lambda: sheet)],
+                               **self.file_manager.zip_options())
+                data = buffer.getvalue()
+            else:
+                with TemporaryDirectory() as folder:
+                    path = Path(folder) / "Акт.xlsx"
+                    if not self.render_book([row], template, path):
+                        raise ValueError(f"Акт {akt_id} не удалось заполнить")
+                    data = path.read_bytes()
         
-        # Материалы
-        materials = []
-        if row[8]:  # Материалы
-            materials.append(row[8])
-        if row[9]:  # Материалы вручную
-            materials.append(row[9])
-        self._write_to_cell(sheet, 'A51', "\n".join(materials))
+        self._rendered[akt_id] = data
+        if len(self._rendered) > self.RENDERED_CACHE_SIZE:
+            self._rendered.popitem(last=False)
+        return data
+
+    def _load_warm_template(self, template_path):
+        """Шаблон для render_one: (шаблон, XML листа или None, файл шаблона); разбирается при изменении шаблона или разметки"""
+        key = (str(template_path),) + tuple(
+            (stat.st_mtime_ns, stat.st_size)
+            for stat in (Path(template_path).stat(), Path(fill_plan_path(template_path)).stat())
+        )
+        if self._warm_template is None or self._warm_template[0] != key:
+            template = self.load_template(template_path)
+            try:
+                sheet_xml = SheetXmlTemplate.load(template_path, template.fill_plan)
+            except TemplateXmlError:
+                sheet_xml = None
+            self._warm_template = (key, template, sheet_xml, Path(template_path).read_bytes())
+            self._rendered.clear()
+        return self._warm_template[1:]
+
+    def render_file(self, row, template, path):
+        """Файл одного акта; ошибка записи сообщается, следующие акты сохраняются дальше
+
+        Акт, который не удалось заполнить, в файл не сохраняется (render_book
+        не пишет книгу без листов). Папка файла (например, папка акта)
+        создается перед сохранением и удаляется, если файл акта не создан.
+        """
+        path = Path(path)
+        created_folder = not path.parent.exists()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        saved = False
+        try:
+            saved = bool(self.render_book([row], template, path))
+        except SaveError as e:
+            print(f"Ошибка при сохранении акта {self.akt_id(row)}: {e}")
+        finally:
+            if created_folder and not saved:
+                with suppress(OSError):
+                    path.parent.rmdir()
+        return saved
+
+    @staticmethod
+    def akt_id(row):
+        """Номер акта: ID и суффикс"""
+        return f"{row.act_id}-{row.suffix}"
+
+    def _copy_template(self, template, new_sheet):
+        """Копирование шаблона с сохранением стилей"""
+        template.stamp(new_sheet)
+
+    @staticmethod
+    def attachments(row):
+        """Текст приложений к акту"""
+        attachments = []
+        if row.schemes:
+            attachments.append(f"Исполнительные схемы: {row.schemes}")
+        if row.materials:
+            attachments.append("Сертификаты на материалы")
+        return "\n".join(attachments)
+
+    def _fill_akt_data(self, sheet, row, plan):
+        """Заполнение данных акта и подписантов по разметке шаблона; возвращает число записанных ячеек"""
+        return plan.fill(sheet, row, self._signatory_values(row))
+
+    def _build_indexes(self):
+        """Вторичные индексы справочников: организации по типу и наименованию, персоналии по причастности"""
+        self.organizations_by_type = {}
+        self.organizations_by_name = {}
+        for org in self.organizations.values():
+            self.organizations_by_type.setdefault(org.type, []).append(org)
+            self.organizations_by_name.setdefault(org.name, org)
         
-        # Исполнительные схемы
-        if row[10]:  # Исп. схемы
-            self._write_to_cell(sheet, 'F59', row[10])
+        self.personnel_by_role = {}
+        for person in self.personnel.values():
+            self.personnel_by_role.setdefault(person.role, []).append(person)
+
+    def prepare_signatories(self, rows):
+        """Пакетное определение подписантов всех актов
+
+        Каждая уникальная комбинация (представитель, организация, дата акта)
+        разрешается один раз, акты с теми же подписантами берут результат из кэша.
+        """
+        for row in rows:
+            self._signatory_values(row)
+
+    def _signatory_values(self, row):
+        """Значения подписантов акта по причастностям, в порядке SIGNATORIES"""
+        act_date = row.act_date
+        key = tuple(getattr(row, field) for field in self.SIGNATORY_FIELDS) + (act_date,)
         
-        # Нормативные документы
-        if row[13]:  # Нормативные документы
-            self._write_to_cell(sheet, 'A61', row[13])
+        values = self._signatory_cache.get(key)
+        if values is None:
+            values = tuple(
+                self._resolve_signatory(index, person_id, act_date)
+                for index, person_id in enumerate(key[:-1])
+            )
+            self._signatory_cache[key] = values
+        return values
+
+    def _resolve_signatory(self, index, person_id, act_date):
+        """Организация и представитель одной роли с учетом даты начала полномочий
+
+        Возвращает значения ячеек организации (наименование, ОГРН и ИНН, адрес
+        и телефон) и представителя (должность и ФИО, НРС и приказ, подпись).
+        """
+        cache_key = (index, person_id, act_date)
+        values = self._role_cache.get(cache_key)
+        if values is not None:
+            return values
         
-        # Последующие работы
-        if row[7]:  # Последующие работы
-            self._write_to_cell(sheet, 'A63', row[7])
+        role, org_type = self.SIGNATORIES[index]
+        default_org = next(iter(self.organizations_by_type.get(org_type, ())), None)
         
-        # Заполнение информации об организациях и персонах
-        self._fill_organization_data(sheet)
+        if person_id:
+            rep = self.personnel.get(person_id)
+            if rep is None:
+                problem = "не найден в листе Персоналии"
+            elif not self._is_active(rep, act_date):
+                active_from = rep.active_from
+                if isinstance(active_from, datetime):
+                    active_from = active_from.strftime("%d.%m.%Y")
+                problem = f"действует с {active_from}, есть более ранние акты"
+                rep = None
+            if rep is None and (index, person_id) not in self._signatory_warnings:
+                # Сообщаем один раз на представителя, а не на каждый акт
+                self._signatory_warnings.add((index, person_id))
+                print(f"Представитель {person_id} ({role}) {problem}")
+            org = (self._person_organization(rep) if rep else None) or default_org
+        else:
+            # Представитель не указан в реестре - берем первого с нужной причастностью
+            rep = next(iter(self.personnel_by_role.get(role, ())), None)
+            org = default_org
         
-        # Примечания
-        if row[14]:  # Примечания
-            self._write_to_cell(sheet, 'K65', row[14])
+        org_values = ()
+        if org:
+            org_values = (
+                org.name,
+                f"ОГРН: {org.ogrn}, ИНН: {org.inn}",
+                f"Адрес: {org.address}, Тел.: {org.phone}",
+            )
         
-        # Приложения
-        attachments = []
-        if row[10]:  # Исп. схемы
-            attachments.append(f"Исполнительные схемы: {row[10]}")
-        if row[8] or row[9]:  # Материалы
-            attachments.append("Сертификаты на материалы")
-        self._write_to_cell(sheet, 'A68', "\n".join(attachments))
-
-    def _fill_organization_data(self, sheet):
-        """Заполнение данных об организациях и персонах"""
-        # Пример заполнения данных заказчика
-        customer_org = next((org for org in self.organizations.values() if org['type'] == 'Заказчик'), None)
-        if customer_org:
-            self._write_to_cell(sheet, 'A11', customer_org['name'])
-            self._write_to_cell(sheet, 'A12', f"ОГРН: {customer_org['ogrn']}, ИНН: {customer_org['inn']}")
-            self._write_to_cell(sheet, 'A13', f"Адрес: {customer_org['address']}, Тел.: {customer_org['phone']}")
+        rep_values = ()
+        if rep:
+            rep_values = (
+                f"{rep.position}, {rep.name}",
+                f"НРС: {rep.nrs}, Приказ: {rep.order}",
+                rep.name,  # Подпись
+            )
         
-        # Заполнение данных представителей
-        customer_rep = next((p for p in self.personnel.values() if p['role'] == 'Заказчик'), None)
-        if customer_rep:
-            self._write_to_cell(sheet, 'A21', f"{customer_rep['position']}, {customer_rep['name']}")
-            self._write_to_cell(sheet, 'A22', f"НРС: {customer_rep['nrs']}, Приказ: {customer_rep['order']}")
-            self._write_to_cell(sheet, 'A72', customer_rep['name'])  # Подпись
-            
-        # Аналогично заполняем данные для других ролей
+        values = (org_values, rep_values)
+        self._role_cache[cache_key] = values
+        return values
+
+    def _person_organization(self, person):
+        """Организация представителя по ID или наименованию из листа Персоналии"""
+        value = person.organization
+        return self.organizations.get(value) or self.organizations_by_name.get(value)
 
-    def _write_to_cell(self, sheet, coord, value):
-        """Безопасная запись в ячейку"""
-        cell = sheet[coord]
-        if not isinstance(cell, openpyxl.cell.cell.MergedCell):
-            cell.value = value
+    @staticmethod
+    def _is_active(person, act_date):
+        """Действуют ли полномочия представителя на дату акта"""
+        active_from = parse_date(person.active_from)
+        if not isinstance(active_from, datetime) or not isinstance(act_date, datetime):
             return True
-        return False
\ No newline at end of file
+        return active_from.date() <= act_date.date()
@@ -1,12 +1,37 @@
+import hashlib
 import os
 import time
+from contextlib import suppress
 from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 import openpyxl
-from openpyxl.utils import get_column_letter
-from copy import copy
-from datetime import datetime
+from openpyxl.writer.excel import ExcelWriter
+from datetime import datetime, timezone
+from modules.metrics import Metrics
+from modules.xlsx_reader import XlsxReader
+
+# Режимы сжатия сохраняемых книг: метод zip и уровень deflate (None - по умолчанию zlib)
+COMPRESSION = {
+    'deflate': (ZIP_DEFLATED, None),
+    'fast': (ZIP_DEFLATED, 1),
+    'stored': (ZIP_STORED, None),
+}
+
+
+class SaveError(OSError):
+    """Файл не удалось сохранить"""
+
 
 class FileManager:
+    def __init__(self, metrics=None, compression='deflate', compresslevel=None):
+        # Время открытия и сохранения книг попадает в замеры запуска
+        self.metrics = metrics or Metrics()
+        if compression not in COMPRESSION:
+            raise ValueError(f"Неизвестный режим сжатия: {compression}")
+        # Режим сжатия книг; compresslevel (0-9) задает уровень deflate явно
+        self.compression = compression
+        self.compresslevel = compresslevel
+
     @staticmethod
     def safe_get(sequence, index, default=None):
         """Безопасное получение элемента"""
@@ -17,14 +42,28 @@ class FileManager:
         except Exception:
             return default
 
-    @staticmethod
-    def load_workbook_safe(path, max_attempts=3):
+    def load_workbook_safe(self, path, max_attempts=3):
         """Загрузка Excel файла с повторами"""
         for attempt in range(max_attempts):
             try:
                 if not Path(path).exists():
                     raise FileNotFoundError(f"Файл не найден: {path}")
-                return openpyxl.load_workbook(path, data_only=True)
+                with self.metrics.stage('open'):
+                    return openpyxl.load_workbook(path, data_only=True)
+            except Exception as e:
+                print(f"Ошибка загрузки (попытка {attempt+1}): {e}")
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(1)
+
+    def open_xlsx_safe(self, path, max_attempts=3):
+        """Открытие xlsx для потокового чтения значений (XlsxReader) с повторами"""
+        for attempt in range(max_attempts):
+            try:
+                if not Path(path).exists():
+                    raise FileNotFoundError(f"Файл не найден: {path}")
+                with self.metrics.stage('open'):
+                    return XlsxReader(path)
             except Exception as e:
                 print(f"Ошибка загрузки (попытка {attempt+1}): {e}")
                 if attempt == max_attempts - 1:
@@ -32,30 +71,101 @@ class FileManager:
                 time.sleep(1)
 
     @staticmethod
-    def create_akt_folder(akt_num, base_dir):
-        """Создает папку для акта"""
+    def akt_folder_path(akt_num, base_dir):
+        """Путь папки акта (папка не создается)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        folder_name = f"Акт_{akt_num}_{timestamp}"
-        folder_path = base_dir / folder_name
+        return base_dir / f"Акт_{akt_num}_{timestamp}"
+
+    @classmethod
+    def create_akt_folder(cls, akt_num, base_dir):
+        """Создает папку для акта"""
+        folder_path = cls.akt_folder_path(akt_num, base_dir)
         folder_path.mkdir(parents=True, exist_ok=True)
         return folder_path
 
-    @staticmethod
-    def save_workbook_safe(wb, filepath, max_attempts=3):
-        """Безопасное сохранение файла"""
+    def zip_options(self, intermediate=False):
+        """Параметры ZipFile для сохраняемой книги
+
+        Промежуточные файлы (листы из них переносятся в другую книгу и
+        сжимаются там) сохраняются без сжатия.
+        """
+        if intermediate:
+            return {'compression': ZIP_STORED, 'compresslevel': None}
+        compression, compresslevel = COMPRESSION[self.compression]
+        if compression == ZIP_DEFLATED and self.compresslevel is not None:
+            compresslevel = self.compresslevel
+        return {'compression': compression, 'compresslevel': compresslevel}
+
+    def write_file_safe(self, filepath, write, max_attempts=3):
+        """Сохранение файла, содержимое которого пишет write(file)
+
+        Данные пишутся потоком во временный файл рядом с filepath, сбрасываются
+        на диск (fsync) и атомарно заменяют прежний файл: при сбое прежний файл
+        остается целым. Замена повторяется с нарастающей паузой (файл может быть
+        открыт в Excel), запись - нет: ее повтор не исправит нехватку места,
+        а книгу write_only сохранить второй раз нельзя.
+        Ошибка ввода-вывода сообщается исключением SaveError.
+        """
+        filepath = Path(filepath)
         temp_path = filepath.with_name(f"temp_{filepath.name}")
-        
+        try:
+            with self.metrics.stage('save'):
+                try:
+                    with open(temp_path, 'wb') as f:
+                        write(f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                except OSError as e:
+                    raise SaveError(f"Не удалось записать {filepath}: {e}") from e
+                self._replace(temp_path, filepath, max_attempts)
+            self.metrics.count('saved_bytes', filepath.stat().st_size)
+            return True
+        finally:
+            if temp_path.exists():
+                with suppress(OSError):
+                    temp_path.unlink()
+
+    @staticmethod
+    def _replace(temp_path, filepath, max_attempts):
+        """Атомарная замена filepath готовым файлом с повторами"""
         for attempt in range(max_attempts):
             try:
-                wb.save(temp_path)
-                if filepath.exists():
-                    filepath.unlink()
-                temp_path.rename(filepath)
-                return True
-            except Exception as e:
+                os.replace(temp_path, filepath)
+                break
+            except OSError as e:
                 print(f"Ошибка сохранения (попытка {attempt+1}): {e}")
-                time.sleep(1)
-        return False
+                if attempt == max_attempts - 1:
+                    raise SaveError(f"Не удалось сохранить {filepath}: {e}") from e
+                time.sleep(0.5 * 2 ** attempt)
+        # Запись о новом файле в папке тоже сбрасывается на диск (на Windows не нужно и недоступно)
+        if hasattr(os, 'O_DIRECTORY'):
+            folder = os.open(filepath.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(folder)
+            except OSError:
+                pass  # Файловая система не поддерживает fsync папок
+            finally:
+                os.close(folder)
+
+    def save_workbook_safe(self, wb, filepath, max_attempts=3, intermediate=False):
+        """Сохранение книги openpyxl с выбранным сжатием (write_file_safe)"""
+        def write(f):
+            if wb.write_only and not wb.worksheets:
+                wb.create_sheet()
+            wb.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+            # ExcelWriter закрывает архив, сам файл закрывает write_file_safe
+            ExcelWriter(wb, ZipFile(f, 'w', allowZip64=True, **self.zip_options(intermediate))).save()
+
+        return self.write_file_safe(filepath, write, max_attempts)
+
+    @staticmethod
+    def file_hash(path, chunk_size=1024 * 1024):
+        """SHA-256 содержимого файла"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
 
     @staticmethod
     def validate_certificate(filepath):
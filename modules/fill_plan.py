@@ -0,0 +1,192 @@
+import json
+from datetime import datetime
+from operator import attrgetter
+from pathlib import Path
+from string import Formatter
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from openpyxl.utils.exceptions import CellCoordinatesException
+from config import DATA_DIR
+
+# Разметка шаблона без собственного файла
+DEFAULT_FILL_PLAN = DATA_DIR / 'Шаблон.fill.json'
+
+
+class FillPlanError(ValueError):
+    """Файл разметки не соответствует шаблону или содержит ошибки"""
+
+
+def fill_plan_path(template_path):
+    """Файл разметки шаблона: рядом с шаблоном, в папке данных или разметка по умолчанию
+
+    Шаблон.xlsx -> Шаблон.fill.json
+    """
+    template_path = Path(template_path)
+    name = f"{template_path.stem}.fill.json"
+    for path in (template_path.with_name(name), DATA_DIR / name):
+        if path.exists():
+            return path
+    return DEFAULT_FILL_PLAN
+
+
+def merged_bounds(sheet):
+    """Границы объединений листа openpyxl: (min_row, min_col, max_row, max_col)"""
+    return tuple(
+        (merged_range.min_row, merged_range.min_col, merged_range.max_row, merged_range.max_col)
+        for merged_range in sheet.merged_cells.ranges
+    )
+
+
+def _date_part(name):
+    def convert(value):
+        return getattr(value, name) if value else ""
+    return convert
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.strftime("%d.%m.%Y")
+    return value or ""
+
+
+# Правила форматирования значения перед записью в ячейку
+FORMATS = {
+    'text': lambda value: "" if value is None else value,
+    'day': _date_part('day'),
+    'month': _date_part('month'),
+    'year': _date_part('year'),
+    'date': _date,
+}
+
+
+class FillPlan:
+    """Скомпилированная разметка шаблона: куда и как записываются данные акта
+
+    Разметка описывается в JSON-файле (см. data/Шаблон.fill.json):
+        "cells" - список записей {"cell": "B26", "field": "akt_id"}, где вместо
+            "field" может быть "text" (строка с полями в фигурных скобках) или
+            "value" (постоянное значение); "format" - правило из FORMATS,
+            "skip_empty": true - не трогать ячейку, если значения нет;
+        "signatories" - ячейки организации и представителя для каждой
+            причастности подписанта.
+    При компиляции координаты переводятся в номера строк и столбцов, ячейки
+    внутри объединений заменяются левой верхней ячейкой объединения по индексу
+    anchors (см. template.anchor_index), а поля
+    связываются с функциями чтения, поэтому заполнение акта - простой проход
+    по готовому списку записей.
+    """
+
+    __slots__ = ('writes', 'signatories', 'source')
+
+    def __init__(self, spec, anchors=None, roles=(), computed=None, accessor=attrgetter, source=None):
+        self.source = source or 'разметка шаблона'
+        anchors = anchors or {}
+        computed = computed or {}
+        used = {}
+
+        def target(coord):
+            """Номер строки и столбца ячейки; ячейка объединения заменяется его левой верхней ячейкой"""
+            try:
+                column, row_idx = coordinate_from_string(coord)
+                col_idx = column_index_from_string(column)
+            except (CellCoordinatesException, TypeError, ValueError) as e:
+                raise FillPlanError(f"{self.source}: неверная ячейка {coord!r}") from e
+
+            row_idx, col_idx = anchors.get((row_idx, col_idx), (row_idx, col_idx))
+            if (row_idx, col_idx) in used:
+                raise FillPlanError(
+                    f"{self.source}: ячейки {used[row_idx, col_idx]} и {coord} указывают на одну ячейку шаблона"
+                )
+            used[row_idx, col_idx] = coord
+            return row_idx, col_idx
+
+        def getter(field):
+            return computed[field] if field in computed else accessor(field)
+
+        writes = []
+        for entry in spec.get('cells', ()):
+            row_idx, col_idx = target(entry.get('cell'))
+            if 'field' in entry:
+                get = getter(entry['field'])
+            elif 'text' in entry:
+                get = self._text(entry['text'], getter)
+            elif 'value' in entry:
+                get = lambda item, value=entry['value']: value
+            else:
+                raise FillPlanError(f"{self.source}: для ячейки {entry.get('cell')} не указано значение")
+
+            convert = None
+            if entry.get('format') is not None:
+                convert = FORMATS.get(entry['format'])
+                if convert is None:
+                    raise FillPlanError(f"{self.source}: неизвестный формат {entry['format']}")
+            writes.append((row_idx, col_idx, get, convert, bool(entry.get('skip_empty'))))
+        self.writes = tuple(writes)
+
+        signatories = spec.get('signatories', {})
+        unknown = set(signatories) - set(roles)
+        if unknown:
+            raise FillPlanError(f"{self.source}: неизвестные подписанты: {', '.join(sorted(unknown))}")
+        self.signatories = tuple(
+            tuple(
+                tuple(None if coord is None else target(coord) for coord in signatories.get(role, {}).get(part) or ())
+                for part in ('organization', 'representative')
+            )
+            for role in roles
+        )
+
+    @classmethod
+    def load(cls, path, anchors=None, roles=(), computed=None, accessor=attrgetter):
+        """Чтение и компиляция файла разметки"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                spec = json.load(f)
+        except ValueError as e:
+            raise FillPlanError(f"{Path(path).name}: {e}") from e
+        return cls(spec, anchors, roles, computed, accessor, Path(path).name)
+
+    def values(self, item, signatories=()):
+        """Значения для записи: (строка, столбец, значение) в порядке разметки
+
+        item - запись акта, signatories - значения подписантов по причастностям.
+        Ячейки со skip_empty без значения пропускаются. Ячейки подписанта без
+        данных (организация или представитель не найдены) очищаются, чтобы в
+        акт не попал образец из шаблона.
+        """
+        for row_idx, col_idx, get, convert, skip_empty in self.writes:
+            value = get(item)
+            if skip_empty and not value:
+                continue
+            yield row_idx, col_idx, convert(value) if convert else value
+
+        for targets, values in zip(self.signatories, signatories):
+            for cells, cell_values in zip(targets, values):
+                for position, target in enumerate(cells):
+                    if target is not None:
+                        yield target[0], target[1], cell_values[position] if position < len(cell_values) else None
+
+    def targets(self):
+        """Все ячейки шаблона, в которые может писать разметка: {(строка, столбец)}"""
+        targets = {(row_idx, col_idx) for row_idx, col_idx, *_ in self.writes}
+        for parts in self.signatories:
+            for cells in parts:
+                targets.update(target for target in cells if target is not None)
+        return targets
+
+    def fill(self, sheet, item, signatories=()):
+        """Заполнение листа openpyxl; возвращает число записанных ячеек"""
+        cell = sheet.cell
+        written = 0
+        for row_idx, col_idx, value in self.values(item, signatories):
+            cell(row=row_idx, column=col_idx).value = value
+            written += 1
+        return written
+
+    @staticmethod
+    def _text(template, getter):
+        """Строка с подстановкой полей записи в фигурных скобках"""
+        fields = {name for _, name, _, _ in Formatter().parse(template) if name}
+        getters = tuple((name, getter(name)) for name in fields)
+
+        def get(item):
+            return template.format_map({name: get_value(item) for name, get_value in getters})
+        return get
@@ -88,7 +88,7 @@ class AktGeneratorGUI:
             self.log_message(f"Найдено актов для обработки: {len(rows)}")
             
             # Обновляем комбобокс
-            akt_numbers = [f"{self.file_manager.safe_get(row, 0, '')}{self.file_manager.safe_get(row, 1, '')}" for row in rows]
+            akt_numbers = [self.processor.akt_id(row) for row in rows]
             self.akt_combobox['values'] = akt_numbers
             
             self.log_message("\nГенерация актов завершена успешно!")
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from zipfile import ZipFile
+from modules.fill_plan import fill_plan_path
+from modules.package import read_sheets, unique_title, write_book
+
+
+def manifest_path(output_path):
+    """Файл манифеста рядом с книгой актов: Акты.xlsx -> Акты.xlsx.manifest.json"""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + '.manifest.json')
+
+
+def book_stamp(path):
+    """Размер и время изменения книги: по ним видно, что книгу после манифеста перезаписали"""
+    stat = Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ActManifest:
+    """Манифест книги актов: хэш шаблона, отметка книги и хэш содержимого каждого акта"""
+
+    VERSION = 2
+
+    def __init__(self, template_hash=None, render_version=None, acts=None, book=None):
+        self.template_hash = template_hash
+        self.render_version = render_version
+        self.acts = acts or {}  # ключ акта -> {'hash': ..., 'sheet': название листа}
+        self.book = book  # book_stamp книги, которую описывает манифест
+
+    @classmethod
+    def load(cls, path):
+        """Чтение манифеста; None, если его нет или он устарел"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != cls.VERSION:
+            return None
+        return cls(data.get('template'), data.get('render_version'), data.get('acts'), data.get('book'))
+
+    def save(self, path):
+        data = {
+            'version': self.VERSION,
+            'template': self.template_hash,
+            'render_version': self.render_version,
+            'acts': self.acts,
+            'book': self.book,
+        }
+        temp_path = Path(path).with_name(f"temp_{Path(path).name}")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+class IncrementalGenerator:
+    """Перегенерация только измененных актов
+
+    Рядом с книгой хранится манифест с хэшами строк реестра и связанных с ними
+    записей справочников. При повторном запуске заполняются только новые и
+    измененные акты, листы остальных переносятся из прежней книги без разбора,
+    акты, удаленные из реестра, в книгу не попадают. Если книгу после
+    манифеста перезаписали (размер или время изменения не совпадают),
+    она собирается заново.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.file_manager = processor.file_manager
+
+    def generate(self, rows, template_path, output_path, streaming=False, progress=None, cancel_event=None):
+        output_path = Path(output_path)
+        template_hash = self._template_hash(template_path)
+        keys = self._act_keys(rows)
+        hashes = [self._act_hash(row) for row in rows]
+
+        old = ActManifest.load(manifest_path(output_path)) if output_path.exists() else None
+        if (old is None or old.template_hash != template_hash
+                or old.render_version != self.processor.RENDER_VERSION or old.book != book_stamp(output_path)):
+            return self._full(rows, keys, hashes, template_path, template_hash, output_path, streaming,
+                              progress, cancel_event)
+
+        changed = [
+            index for index, (key, act_hash) in enumerate(zip(keys, hashes))
+            if old.acts.get(key, {}).get('hash') != act_hash
+        ]
+        removed = len(set(old.acts) - set(keys))
+        if not changed and not removed and list(old.acts) == keys:
+            return self._result(output_path, rows, len(keys), [], len(keys))
+
+        temp_path = output_path.with_name(f"temp_render_{output_path.name}")
+        try:
+            rendered = []
+            if changed:
+                template = self.processor.load_template(template_path)
+                # Книга измененных актов нужна только для переноса листов и не сжимается
+                rendered = self.processor.render_book([rows[index] for index in changed], template, temp_path,
+                                                      streaming, progress, cancel_event, intermediate=True)
+                rendered = [changed[index] for index in rendered]
+
+            with ZipFile(output_path) as old_book:
+                old_parts = dict(read_sheets(old_book))
+                if rendered:
+                    with ZipFile(temp_path) as new_book:
+                        # Стили разошлись (например, в данных появились даты) - книгу нужно собрать заново
+                        spliced = None
+                        if new_book.read('xl/styles.xml') == old_book.read('xl/styles.xml'):
+                            spliced = self._splice(rows, keys, hashes, template_hash, output_path,
+                                                  old, old_book, old_parts, new_book, rendered)
+                else:
+                    spliced = self._splice(rows, keys, hashes, template_hash, output_path,
+                                          old, old_book, old_parts, old_book, [])
+            if spliced is None:
+                return self._full(rows, keys, hashes, template_path, template_hash, output_path, streaming,
+                                  progress, cancel_event)
+
+            manifest, result = spliced
+            os.replace(self._spliced_path(output_path), output_path)
+            manifest.book = book_stamp(output_path)
+            manifest.save(manifest_path(output_path))
+            result['removed'] = removed
+            return result
+        finally:
+            for path in (temp_path, self._spliced_path(output_path)):
+                if path.exists():
+                    path.unlink()
+
+    def _full(self, rows, keys, hashes, template_path, template_hash, output_path, streaming,
+              progress=None, cancel_event=None):
+        """Полная генерация книги и запись нового манифеста"""
+        template = self.processor.load_template(template_path)
+        rendered = self.processor.render_book(rows, template, output_path, streaming, progress, cancel_event)
+        if not rendered:
+            raise ValueError("Ни один акт не удалось заполнить")
+        with ZipFile(output_path) as book:
+            titles = [title for title, _ in read_sheets(book)]
+
+        manifest = ActManifest(template_hash, self.processor.RENDER_VERSION, book=book_stamp(output_path))
+        for index, title in zip(rendered, titles):
+            manifest.acts[keys[index]] = {'hash': hashes[index], 'sheet': title}
+        manifest.save(manifest_path(output_path))
+        return self._result(output_path, rows, len(rendered), rendered, 0)
+
+    def _splice(self, rows, keys, hashes, template_hash, output_path, old, old_book, old_parts, new_book, rendered):
+        """Сборка книги из прежних листов и заново заполненных актов"""
+        new_parts = dict(zip(rendered, (part for _, part in read_sheets(new_book))))
+        manifest = ActManifest(template_hash, self.processor.RENDER_VERSION)
+        sheets = []
+        used_titles = set()
+
+        for index, key in enumerate(keys):
+            if index in new_parts:
+                source, part = new_book, new_parts[index]
+            elif key in old.acts and old.acts[key]['hash'] == hashes[index]:
+                source, part = old_book, old_parts.get(old.acts[key]['sheet'])
+            else:
+                continue  # акт не удалось заполнить
+            if part is None:
+                continue
+
+            title = unique_title(f"Акт {self.processor.akt_id(rows[index])}", used_titles)
+            sheets.append((title, source, part))
+            manifest.acts[key] = {'hash': hashes[index], 'sheet': title}
+
+        # Книга собирается во временный файл и заменяет прежнюю после закрытия источников
+        write_book(self._spliced_path(output_path), new_book, sheets, **self.file_manager.zip_options())
+        return manifest, self._result(output_path, rows, len(sheets), rendered, len(sheets) - len(rendered))
+
+    @staticmethod
+    def _spliced_path(output_path):
+        return output_path.with_name(f"temp_{output_path.name}")
+
+    def _template_hash(self, template_path):
+        """Хэш шаблона вместе с его разметкой: правка любого из файлов перезаполняет все акты"""
+        return ':'.join(
+            self.file_manager.file_hash(path) for path in (template_path, fill_plan_path(template_path))
+        )
+
+    def _act_keys(self, rows):
+        """Ключи актов; повторяющиеся номера различаются порядковым номером"""
+        seen = {}
+        keys = []
+        for row in rows:
+            akt_id = self.processor.akt_id(row)
+            seen[akt_id] = seen.get(akt_id, 0) + 1
+            keys.append(akt_id if seen[akt_id] == 1 else f"{akt_id}#{seen[akt_id]}")
+        return keys
+
+    def _act_hash(self, row):
+        """Хэш строки реестра вместе с подписантами и записями справочников, на которые она ссылается"""
+        processor = self.processor
+        parts = [row, processor._signatory_values(row)]
+        for value in row:
+            if isinstance(value, str):
+                for code in value.split(';'):
+                    code = code.strip()
+                    if code in processor.certificates:
+                        parts.append(('certificate', code, processor.certificates[code]))
+                    if code in processor.normatives:
+                        parts.append(('normative', code, processor.normatives[code]))
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _result(output_path, rows, success, rendered, reused, removed=0):
+        return {
+            'file': output_path,
+            'total': len(rows),
+            'success': success,
+            'rendered': len(rendered),
+            'reused': reused,
+            'removed': removed,
+            'status': 'success'
+        }
@@ -0,0 +1,131 @@
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def peak_rss_mb():
+    """Пиковая память процесса в МБ (None, если платформа не сообщает ее)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает КБ, macOS - байты
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Metrics:
+    """Замеры запуска генерации: время этапов, счетчики и пиковая память
+
+    Этапы (load, validate, template, copy, fill, flush, save) накапливают
+    время и число вызовов, счетчики - число актов, записанных ячеек, стилей
+    и байт сохраненных файлов (saved_bytes).
+    Замеры рабочих процессов добавляются в общие через merge.
+    """
+
+    # Сколько строк статистики tracemalloc сохранять в отчет профилирования
+    MEMORY_TOP = 30
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.traced_peak_mb = None
+        self.workers_peak_rss_mb = None
+
+    def reset(self):
+        """Сброс замеров перед новым запуском"""
+        self.__init__()
+
+    @contextmanager
+    def stage(self, name):
+        """Замер времени блока как этапа name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def add_stage(self, name, seconds, calls=1):
+        total = self.stages.get(name)
+        self.stages[name] = (total[0] + seconds, total[1] + calls) if total else (seconds, calls)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, summary):
+        """Добавление замеров другого процесса (результат summary)"""
+        for name, stage in summary['stages'].items():
+            self.add_stage(name, stage['seconds'], stage['calls'])
+        for name, value in summary['counters'].items():
+            self.count(name, value)
+        peaks = [peak for peak in (self.workers_peak_rss_mb, summary['peak_rss_mb']) if peak is not None]
+        self.workers_peak_rss_mb = max(peaks) if peaks else None
+
+    def summary(self):
+        """Замеры в виде словаря для журнала и JSON"""
+        summary = {
+            'stages': {
+                name: {'seconds': round(seconds, 3), 'calls': calls}
+                for name, (seconds, calls) in self.stages.items()
+            },
+            'counters': dict(self.counters),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        if self.workers_peak_rss_mb is not None:
+            summary['workers_peak_rss_mb'] = self.workers_peak_rss_mb
+        if self.traced_peak_mb is not None:
+            summary['traced_peak_mb'] = self.traced_peak_mb
+        return summary
+
+    def lines(self):
+        """Текст замеров для журнала"""
+        summary = self.summary()
+        lines = ["Замеры:"]
+        for name, stage in summary['stages'].items():
+            lines.append(f"  {name}: {stage['seconds']:.3f} с, вызовов {stage['calls']}")
+        if summary['counters']:
+            lines.append("  " + ", ".join(f"{name} {value}" for name, value in summary['counters'].items()))
+        memory = [f"пиковая память {summary['peak_rss_mb']} МБ"]
+        if 'workers_peak_rss_mb' in summary:
+            memory.append(f"в рабочих процессах {summary['workers_peak_rss_mb']} МБ")
+        if 'traced_peak_mb' in summary:
+            memory.append(f"по tracemalloc {summary['traced_peak_mb']} МБ")
+        lines.append("  " + ", ".join(memory))
+        return lines
+
+    def save(self, path, **extra):
+        """Запись замеров в JSON-файл"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(dict(self.summary(), **extra), ensure_ascii=False, indent=2, default=str),
+                        encoding='utf-8')
+
+    @contextmanager
+    def profile(self, path):
+        """Профилирование блока: cProfile в path (.prof), распределение памяти в path.memory.txt
+
+        Профиль открывается pstats или snakeviz; tracemalloc заметно
+        замедляет работу, поэтому профилирование включается только явно.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            self.traced_peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            tracemalloc.stop()
+
+            profiler.dump_stats(path)
+            top = snapshot.statistics('lineno')[:self.MEMORY_TOP]
+            path.with_name(f"{path.stem}.memory.txt").write_text(
+                "\n".join(str(stat) for stat in top), encoding='utf-8'
+            )
@@ -0,0 +1,194 @@
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+from itertools import count
+from xml.sax.saxutils import escape, quoteattr
+from zipfile import ZipFile, ZIP_DEFLATED
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+WORKSHEET_REL = REL_NS + "/worksheet"
+WORKSHEET_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+CALC_CHAIN_REL = REL_NS + "/calcChain"
+
+WORKBOOK_PART = "xl/workbook.xml"
+WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+_SHEETS_RE = re.compile(r"<sheets\s*/>|<sheets>.*?</sheets>", re.S)
+_DEFINED_NAMES_RE = re.compile(r"<definedNames\s*/>|<definedNames>.*?</definedNames>", re.S)
+# Элементы книги, после которых по схеме идут definedNames
+_BEFORE_NAMES_RE = re.compile(r"</externalReferences>|<externalReferences\s*/>|</sheets>")
+# Ссылка на лист в начале диапазона: 'Акт 1'!$A$1 или Лист1!$A$1
+_SHEET_REF_RE = re.compile(r"(?:'(?:[^']|'')+'|[^'!,]+)!")
+
+
+def _rels_part(part):
+    """Путь к файлу связей части пакета: xl/worksheets/sheet1.xml -> xl/worksheets/_rels/sheet1.xml.rels"""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _element_xml(element):
+    """Пустой элемент без префиксов пространств имен: Default/Override из [Content_Types].xml"""
+    tag = element.tag.rsplit("}", 1)[-1]
+    attrs = " ".join(f"{name}={quoteattr(value)}" for name, value in element.attrib.items())
+    return f"<{tag} {attrs}/>"
+
+
+def _workbook_target(target):
+    """Путь части пакета по цели связи книги: worksheets/sheet1.xml -> xl/worksheets/sheet1.xml"""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def read_sheets(archive):
+    """Листы книги в порядке следования: [(название, путь к части листа)]"""
+    targets = {}
+    for rel in ET.fromstring(archive.read(WORKBOOK_RELS_PART)):
+        if rel.get("Type") == WORKSHEET_REL:
+            targets[rel.get("Id")] = _workbook_target(rel.get("Target"))
+
+    workbook = ET.fromstring(archive.read(WORKBOOK_PART))
+    sheets = []
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        rel_id = sheet.get(f"{{{REL_NS}}}id")
+        if rel_id in targets:
+            sheets.append((sheet.get("name"), targets[rel_id]))
+    return sheets
+
+
+def read_print_names(archive):
+    """Имена печати листов (_xlnm.Print_Area, _xlnm.Print_Titles): {путь к части листа: [(имя, диапазоны)]}
+
+    Диапазоны возвращаются без названия листа, чтобы их можно было привязать
+    к листу под новым названием и номером.
+    """
+    parts = [part for _, part in read_sheets(archive)]
+    names = {}
+    workbook = ET.fromstring(archive.read(WORKBOOK_PART))
+    for element in workbook.iter(f"{{{MAIN_NS}}}definedName"):
+        local = element.get("localSheetId")
+        if local is None or not element.get("name", "").startswith("_xlnm.") or int(local) >= len(parts):
+            continue
+        names.setdefault(parts[int(local)], []).append((element.get("name"), _SHEET_REF_RE.sub("", element.text or "")))
+    return names
+
+
+def _defined_names_xml(base, sheets):
+    """Определенные имена собранной книги: общие имена base и имена печати каждого листа"""
+    items = []
+    workbook = ET.fromstring(base.read(WORKBOOK_PART))
+    for element in workbook.iter(f"{{{MAIN_NS}}}definedName"):
+        if element.get("localSheetId") is None:
+            attrs = " ".join(f"{name}={quoteattr(value)}" for name, value in element.attrib.items())
+            items.append(f"<definedName {attrs}>{escape(element.text or '')}</definedName>")
+
+    print_names = {}
+    for index, (title, source, part) in enumerate(sheets):
+        if id(source) not in print_names:
+            print_names[id(source)] = read_print_names(source)
+        quoted = "'" + title.replace("'", "''") + "'"
+        for name, ranges in print_names[id(source)].get(part, ()):
+            value = ",".join(f"{quoted}!{cell_range}" for cell_range in ranges.split(","))
+            items.append(f'<definedName name={quoteattr(name)} localSheetId="{index}">{escape(value)}</definedName>')
+    return f"<definedNames>{''.join(items)}</definedNames>" if items else ""
+
+
+def unique_title(title, used):
+    """Название листа длиной до 31 символа, не совпадающее с уже занятыми"""
+    title = title[:31]
+    candidate = title
+    counter = 1
+    while candidate.lower() in used:
+        suffix = str(counter)
+        candidate = title[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def write_book(output_path, base, sheets, compression=ZIP_DEFLATED, compresslevel=None):
+    """Сборка книги из готовых XML-частей листов
+
+    output_path - путь или открытый на запись файл; compression и compresslevel -
+    сжатие частей (FileManager.zip_options).
+    base - открытый пакет xlsx, из которого берутся стили, тема и свойства;
+    sheets - список (название, пакет-источник, путь к части листа) в нужном порядке.
+    Части листов переносятся без разбора XML, стили у всех источников должны совпадать.
+    Четвертый элемент записи, если он есть, - функция, возвращающая XML листа
+    вместо части источника (связи листа тогда не переносятся) или None, если
+    лист нужно пропустить; имена печати берутся у части источника.
+    Цепочка вычислений (calcChain) ссылается на листы исходного пакета
+    и не переносится, Excel строит ее заново.
+    """
+    skip = {WORKBOOK_PART, WORKBOOK_RELS_PART, CONTENT_TYPES_PART}
+    base_sheet_parts = {part for _, part in read_sheets(base)}
+    skip.update(base_sheet_parts)
+    skip.update(_rels_part(part) for part in base_sheet_parts)
+
+    base_rels = [rel for rel in ET.fromstring(base.read(WORKBOOK_RELS_PART)) if rel.get("Type") != WORKSHEET_REL]
+    calc_chain = {_workbook_target(rel.get("Target")) for rel in base_rels if rel.get("Type") == CALC_CHAIN_REL}
+    skip.update(calc_chain)
+
+    with ZipFile(output_path, "w", compression=compression, compresslevel=compresslevel, allowZip64=True) as out:
+        for info in base.infolist():
+            if info.filename not in skip:
+                out.writestr(info.filename, base.read(info.filename))
+
+        # Прочие связи книги сохраняют свои Id: на них ссылается workbook.xml
+        # (например, externalReference), листы получают свободные Id
+        kept_rels = [rel for rel in base_rels if rel.get("Type") != CALC_CHAIN_REL]
+        used_ids = {rel.get("Id") for rel in kept_rels}
+        sheet_ids = (f"rId{number}" for number in count(1) if f"rId{number}" not in used_ids)
+
+        sheet_xml = []
+        rels_xml = []
+        overrides = []
+        written = []
+        for title, source, part, *render in sheets:
+            index = len(written) + 1
+            new_part = f"xl/worksheets/sheet{index}.xml"
+            if render:
+                data = render[0]()
+                if data is None:
+                    continue
+                out.writestr(new_part, data)
+            else:
+                out.writestr(new_part, source.read(part))
+                try:
+                    out.writestr(_rels_part(new_part), source.read(_rels_part(part)))
+                except KeyError:
+                    pass  # У листа нет связей
+            written.append((title, source, part))
+
+            rel_id = next(sheet_ids)
+            sheet_xml.append(f'<sheet name={quoteattr(title)} sheetId="{index}" state="visible" r:id="{rel_id}"/>')
+            rels_xml.append(f'<Relationship Type="{WORKSHEET_REL}" Target="/{new_part}" Id="{rel_id}"/>')
+            overrides.append(f'<Override PartName="/{new_part}" ContentType="{WORKSHEET_TYPE}"/>')
+
+        # Связи книги: сначала листы, затем остальные связи исходного пакета
+        rels_xml.extend(_element_xml(rel) for rel in kept_rels)
+        out.writestr(WORKBOOK_RELS_PART,
+                     f'<Relationships xmlns="{PKG_REL_NS}">{"".join(rels_xml)}</Relationships>')
+
+        # Имена печати привязаны к номерам листов и переносятся вместе с листами;
+        # по схеме definedNames идут после sheets и externalReferences
+        workbook = _DEFINED_NAMES_RE.sub("", base.read(WORKBOOK_PART).decode("utf-8"), count=1)
+        workbook = _SHEETS_RE.sub(lambda _: f"<sheets>{''.join(sheet_xml)}</sheets>", workbook, count=1)
+        names_xml = _defined_names_xml(base, written)
+        if names_xml:
+            position = list(_BEFORE_NAMES_RE.finditer(workbook))[-1].end()
+            workbook = workbook[:position] + names_xml + workbook[position:]
+        out.writestr(WORKBOOK_PART, workbook)
+
+        types = ET.fromstring(base.read(CONTENT_TYPES_PART))
+        kept = [
+            _element_xml(item) for item in types
+            if item.get("ContentType") != WORKSHEET_TYPE and item.get("PartName", "")[1:] not in calc_chain
+        ]
+        out.writestr(CONTENT_TYPES_PART,
+                     f'<Types xmlns="{CT_NS}">{"".join(kept)}{"".join(overrides)}</Types>')
@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from pathlib import Path
+from modules.register import Register
+
+# Состояние рабочего процесса: процессор со справочниками, скомпилированный шаблон
+# и, при clone, XML листа шаблона для сборки книги из пакета
+_processor = None
+_template = None
+_template_path = None
+_sheet_xml = None
+
+# Как часто (в секундах) проверять отмену, пока части заполняются
+CANCEL_POLL_INTERVAL = 0.2
+
+
+def split_rows(rows, shards):
+    """Деление строк на последовательные части близкого размера"""
+    size, rest = divmod(len(rows), shards)
+    parts = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < rest else 0)
+        parts.append(rows[start:end])
+        start = end
+    return parts
+
+
+def shard_path(output_path, index):
+    """Имя файла части: Акты.xlsx -> Акты_01.xlsx"""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_{index:02d}{output_path.suffix}")
+
+
+def _init_worker(lookups, template_path, compression, compresslevel, use_cache=True, clone=False):
+    """Загрузка справочников и шаблона один раз на рабочий процесс"""
+    global _processor, _template, _template_path, _sheet_xml
+    from modules.act_processor import ActProcessor
+    from modules.sheet_xml import SheetXmlTemplate, TemplateXmlError
+
+    _processor = ActProcessor(use_cache=use_cache, compression=compression, compresslevel=compresslevel)
+    _processor.use_register(lookups)
+    _template = _processor.load_template(template_path)
+    _template_path = template_path
+    _sheet_xml = None
+    if clone:
+        try:
+            _sheet_xml = SheetXmlTemplate.load(template_path, _template.fill_plan)
+        except TemplateXmlError as e:
+            print(f"Шаблон нельзя размножить на уровне XML ({e}), книга строится обычным способом")
+
+
+def _render_shard(rows, output_path, streaming, cancel_event=None):
+    """Заполнение части реестра; возвращает индексы созданных листов и замеры задания
+
+    cancel_event - общее для процессов событие (Manager().Event()): при отмене
+    часть прерывается GenerationCancelled и файл не сохраняется.
+    """
+    _processor.metrics.reset()
+    if _sheet_xml is not None:
+        rendered = _processor.render_cloned_book(rows, _template_path, _sheet_xml, _template.fill_plan, output_path,
+                                                 cancel_event=cancel_event)
+    else:
+        rendered = _processor.render_book(rows, _template, output_path, streaming, cancel_event=cancel_event)
+    return rendered, _processor.metrics.summary()
+
+
+def _render_files(batch):
+    """Сохранение каждого акта части в свой файл; возвращает пути созданных файлов и замеры задания"""
+    _processor.metrics.reset()
+    files = [path for row, path in batch if _processor.render_file(row, _template, path)]
+    return files, _processor.metrics.summary()
+
+
+def worker_pool(processor, template_path, workers, clone=False):
+    """Пул процессов со справочниками и шаблоном, загруженными в каждый процесс"""
+    # Строки реестра передаются только своей части, в процессы уходят справочники
+    lookups = Register()
+    lookups.organizations = processor.organizations
+    lookups.personnel = processor.personnel
+    lookups.normatives = processor.normatives
+    lookups.certificates = processor.certificates
+    file_manager = processor.file_manager
+    # Процессы пользуются кэшем шаблонов, только если он включен у процессора
+    use_cache = processor.template_cache is not None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(lookups, template_path, file_manager.compression, file_manager.compresslevel,
+                                         use_cache, clone))
+
+
+def generate_parallel(processor, rows, template_path, output_path, streaming=False, workers=None, clone=False,
+                      progress=None, cancel_event=None):
+    """Генерация актов в нескольких процессах, по файлу на каждую часть реестра
+
+    Прогресс сообщается по мере готовности частей. При отмене части,
+    которые еще заполняются, прерываются через общее событие отмены,
+    а уже сохраненные в этом запуске файлы частей удаляются.
+    При clone=True каждая часть собирается из XML листа шаблона,
+    как в ActProcessor.render_cloned_book.
+    """
+    rows = list(rows)
+    workers = workers or os.cpu_count() or 1
+    shards = split_rows(rows, max(1, min(workers, len(rows))))
+    files = [shard_path(output_path, index) for index, _ in enumerate(shards, 1)]
+
+    # Событие отмены потока GUI недоступно рабочим процессам, им передается общее через Manager
+    manager = Manager() if cancel_event is not None else None
+    try:
+        shared_cancel = manager.Event() if manager is not None else None
+        executor = worker_pool(processor, template_path, len(shards), clone)
+        try:
+            futures = {
+                executor.submit(_render_shard, shard, file, streaming, shared_cancel): (shard, file)
+                for shard, file in zip(shards, files)
+            }
+            pending = set(futures)
+            saved = set()
+            success = 0
+            done = 0
+            while pending:
+                finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set():
+                    shared_cancel.set()
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    _remove_saved(futures)
+                    return {
+                        'file': output_path,
+                        'files': [],
+                        'error': "Генерация отменена",
+                        'status': 'cancelled'
+                    }
+                for future in finished:
+                    shard, file = futures[future]
+                    rendered, metrics = future.result()
+                    processor.metrics.merge(metrics)
+                    success += len(rendered)
+                    if rendered:
+                        saved.add(file)
+                    done += len(shard)
+                    if progress:
+                        akt_id = processor.akt_id(shard[-1]) if shard else None
+                        progress(done, len(rows), akt_id, None)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        # Часть, в которой не заполнен ни один акт, файла не имеет
+        return {
+            'file': output_path,
+            'files': [file for file in files if file in saved],
+            'total': len(rows),
+            'success': success,
+            'status': 'success'
+        }
+
+    except Exception as e:
+        return {
+            'file': output_path,
+            'files': files,
+            'error': str(e),
+            'status': 'error'
+        }
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+
+def _remove_saved(futures):
+    """Удаление файлов частей, которые успели сохраниться до отмены"""
+    for future, (_, path) in futures.items():
+        if future.done() and not future.cancelled() and future.exception() is None and path.exists():
+            path.unlink()
@@ -0,0 +1,205 @@
+from datetime import datetime
+from operator import itemgetter
+
+
+class Record:
+    """Запись листа реестра с фиксированным набором полей
+
+    COLUMNS - описания столбцов (Column) в порядке столбцов листа
+    по умолчанию; поля хранятся в __slots__, без словаря на каждый объект.
+    """
+
+    __slots__ = ()
+    COLUMNS = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        """Значения полей в порядке COLUMNS"""
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self):
+        return tuple(self)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class Column:
+    """Описание столбца листа: поле записи, заголовки (первый - основной), тип значения"""
+
+    __slots__ = ('field', 'titles', 'kind', 'required')
+
+    def __init__(self, field, *titles, kind=None, required=False):
+        self.field = field
+        self.titles = titles
+        self.kind = kind
+        self.required = required
+
+
+class SchemaError(ValueError):
+    """Заголовки листа не соответствуют описанию записи"""
+
+
+def parse_date(value):
+    """Дата из ячейки: datetime как есть, строка "дд.мм.гггг" разбирается, прочее без изменений"""
+    if isinstance(value, str):
+        text = value.strip()
+        for date_format in ("%d.%m.%Y", "%d.%m.%y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(text, date_format)
+            except ValueError:
+                pass
+    return value
+
+
+# Преобразования значений по типу столбца
+CONVERTERS = {'date': parse_date}
+
+
+def _fields(columns):
+    return tuple(column.field for column in columns)
+
+
+class Organization(Record):
+    COLUMNS = (
+        Column('id', 'ID', required=True), Column('type', 'Тип', required=True),
+        Column('name', 'Наименование', required=True), Column('ogrn', 'ОГРН'), Column('inn', 'ИНН'),
+        Column('address', 'Адрес'), Column('phone', 'Телефон'), Column('sro', 'СРО'),
+    )
+    __slots__ = _fields(COLUMNS)
+
+
+class Person(Record):
+    COLUMNS = (
+        Column('id', 'ID', required=True), Column('name', 'ФИО', required=True), Column('position', 'Должность'),
+        Column('organization', 'Организация'), Column('role', 'Причастность', required=True),
+        Column('phone', 'Телефон'), Column('nrs', 'НРС'), Column('order', 'Приказ'),
+        Column('active_from', 'Действует с', kind='date'),
+    )
+    __slots__ = _fields(COLUMNS)
+
+
+class Normative(Record):
+    COLUMNS = (
+        Column('code', 'Код', required=True), Column('name', 'Наименование'), Column('type', 'Тип'),
+        Column('status', 'Статус'), Column('full_name', 'Полное наименование'),
+    )
+    __slots__ = _fields(COLUMNS)
+
+
+class Certificate(Record):
+    COLUMNS = (
+        Column('id', 'ID', required=True), Column('number', 'Номер сертификата'),
+        Column('material', 'Наименование материала'), Column('manufacturer', 'Производитель'),
+        Column('issued', 'Дата выдачи', kind='date'), Column('valid_until', 'Срок действия', kind='date'),
+    )
+    __slots__ = _fields(COLUMNS)
+
+
+class ActRecord(Record):
+    """Строка листа "Реестр актов\""""
+
+    COLUMNS = (
+        Column('act_id', 'ID акта', required=True),
+        Column('suffix', 'Суффикс', 'Суффикс акта'),
+        Column('number', 'Номер', 'Номер п/п'),
+        Column('work_name', 'Наименование работ', required=True),
+        Column('start_date', 'Дата начала', kind='date'),
+        Column('end_date', 'Дата окончания', kind='date'),
+        Column('act_date', 'Дата акта', kind='date', required=True),
+        Column('next_works', 'Последующие работы'),
+        Column('materials', 'Материалы'),
+        Column('schemes', 'Исп. схемы', 'Исп. схема', 'Исполнительные схемы'),
+        Column('project', 'Проект'),
+        Column('project_sheet', 'Лист проекта'),
+        Column('normatives', 'Нормативные документы', 'Нормативы', 'СНИП'),
+        Column('status', 'Статус'),
+        Column('notes', 'Примечания', 'Примечание', 'Дополнительные сведения'),
+        Column('customer_rep', 'Представитель заказчика'),
+        Column('general_contractor_rep', 'Представитель генподрядчика'),
+        Column('supervisor_rep', 'Технический надзор', 'Представитель технадзора'),
+        Column('designer_rep', 'Проектировщик', 'Представитель проектировщика'),
+        Column('contractor_rep', 'Исполнитель работ', 'Представитель исполнителя'),
+        Column('copies', 'Кол-во экз', 'Количество экземпляров'),
+    )
+    __slots__ = _fields(COLUMNS)
+
+
+class ColumnMap:
+    """Скомпилированная схема листа: соответствие полей записи столбцам
+
+    Строится один раз по строке заголовков. Столбцы ищутся по основному
+    заголовку или его синонимам без учета регистра и крайних пробелов,
+    порядок столбцов на листе не важен, лишние столбцы пропускаются.
+    Если ни один заголовок не узнан, используется порядок COLUMNS.
+    Отсутствие обязательного столбца или повтор заголовка - SchemaError.
+    """
+
+    def __init__(self, record_class, header, sheet_name=None):
+        self.record_class = record_class
+        sheet_name = sheet_name or record_class.__name__
+        titles = {}
+        duplicates = []
+        for index, title in enumerate(header or ()):
+            if isinstance(title, str) and title.strip():
+                key = title.strip().lower()
+                if key in titles:
+                    duplicates.append(title.strip())
+                titles.setdefault(key, index)
+
+        columns = record_class.COLUMNS
+        indexes = [
+            next((titles[title.lower()] for title in column.titles if title.lower() in titles), None)
+            for column in columns
+        ]
+        if all(index is None for index in indexes):
+            indexes = list(range(len(columns)))
+        else:
+            used = {titles[title.lower()] for column in columns for title in column.titles if title.lower() in titles}
+            duplicates = [title for title in duplicates if titles[title.lower()] in used]
+            missing = [column.titles[0] for column, index in zip(columns, indexes) if column.required and index is None]
+            problems = []
+            if missing:
+                problems.append(f"нет столбцов: {', '.join(missing)}")
+            if duplicates:
+                problems.append(f"повторяются столбцы: {', '.join(duplicates)}")
+            if problems:
+                raise SchemaError(f"Лист \"{sheet_name}\": {'; '.join(problems)}")
+
+        self.indexes = dict(zip(record_class.__slots__, indexes))
+        # Строка обрезается до нужных столбцов, отсутствующие поля читаются
+        # из дополнительного пустого столбца в ее конце
+        self._used = max((index for index in indexes if index is not None), default=-1) + 1
+        self._has_missing = None in indexes
+        self._getter = itemgetter(*(self._used if index is None else index for index in indexes))
+        self._padding = (None,) * (self._used + 1)
+        self._converters = tuple(
+            (position, CONVERTERS[column.kind])
+            for position, (column, index) in enumerate(zip(columns, indexes))
+            if column.kind in CONVERTERS and index is not None
+        )
+
+    def make(self, row):
+        """Запись из строки значений листа"""
+        if self._has_missing or len(row) < self._used:
+            row = tuple(row[:self._used]) + self._padding[min(len(row), self._used):]
+        values = self._getter(row)
+        if self._converters:
+            values = list(values)
+            for position, convert in self._converters:
+                values[position] = convert(values[position])
+        return self.record_class(*values)
@@ -0,0 +1,96 @@
+from modules.file_manager import FileManager
+from modules.records import ActRecord, Certificate, ColumnMap, Normative, Organization, Person
+
+
+class Register:
+    """Данные реестра АОСР в памяти: справочники по ID и записи актов
+
+    row_numbers - номера строк листа "Реестр актов" для записей rows (для отчета проверки).
+    """
+
+    __slots__ = ('organizations', 'personnel', 'normatives', 'certificates', 'rows', 'row_numbers')
+
+    def __init__(self):
+        self.organizations = {}
+        self.personnel = {}
+        self.normatives = {}
+        self.certificates = {}
+        self.rows = []
+        self.row_numbers = []
+
+
+class RegisterReader:
+    """Чтение реестра АОСР за одно открытие файла
+
+    Листы читаются XlsxReader: значения строк берутся прямо из XML
+    без построения ячеек openpyxl.
+    """
+
+    SHEETS = ('Организации', 'Персоналии', 'Нормативы', 'Сертификаты', 'Реестр актов')
+
+    def __init__(self, file_manager=None):
+        self.file_manager = file_manager or FileManager()
+        self._parsers = {
+            'Организации': self._read_organizations,
+            'Персоналии': self._read_personnel,
+            'Нормативы': self._read_normatives,
+            'Сертификаты': self._read_certificates,
+            'Реестр актов': self._read_acts,
+        }
+
+    def read(self, register_path, sheets=SHEETS):
+        """Загрузка листов реестра за один проход по книге
+
+        sheets - какие листы читать (по умолчанию все); справочники
+        непрочитанных листов остаются пустыми.
+        """
+        register = Register()
+        with self.file_manager.open_xlsx_safe(register_path) as book:
+            missing = [name for name in sheets if name not in book.sheetnames]
+            if missing:
+                raise KeyError(f"В реестре нет листов: {', '.join(missing)}")
+
+            # Листы читаются в порядке хранения в файле; схема каждого листа
+            # строится по строке заголовков и проверяется до чтения данных
+            for name in book.sheetnames:
+                parser = self._parsers.get(name) if name in sheets else None
+                if parser:
+                    rows = book.iter_rows(name)
+                    parser(next(rows, ()), rows, register)
+        return register
+
+    def _read_organizations(self, header, rows, register):
+        columns = ColumnMap(Organization, header, 'Организации')
+        for row in rows:
+            if row and row[0]:  # Проверяем, что есть ID организации
+                org = columns.make(row)
+                register.organizations[org.id] = org
+
+    def _read_personnel(self, header, rows, register):
+        columns = ColumnMap(Person, header, 'Персоналии')
+        for row in rows:
+            if row and row[0]:  # Проверяем, что есть ID персоналии
+                person = columns.make(row)
+                register.personnel[person.id] = person
+
+    def _read_normatives(self, header, rows, register):
+        columns = ColumnMap(Normative, header, 'Нормативы')
+        for row in rows:
+            if row and row[0]:  # Проверяем, что есть код норматива
+                normative = columns.make(row)
+                register.normatives[normative.code] = normative
+
+    def _read_certificates(self, header, rows, register):
+        columns = ColumnMap(Certificate, header, 'Сертификаты')
+        for row in rows:
+            if row and row[0]:  # Проверяем, что есть ID сертификата
+                cert = columns.make(row)
+                register.certificates[cert.id] = cert
+
+    def _read_acts(self, header, rows, register):
+        # Пустые строки не храним, номера строк листа запоминаем для отчета проверки
+        columns = ColumnMap(ActRecord, header, 'Реестр актов')
+        for number, row in enumerate(rows, 2):
+            if any(cell is not None for cell in row):
+                register.rows.append(columns.make(row))
+                register.row_numbers.append(number)
@@ -0,0 +1,155 @@
+import json
+import os
+import pickle
+from contextlib import suppress
+from pathlib import Path
+from modules.file_manager import FileManager
+
+
+class FileCache:
+    """Дисковый кэш результатов разбора файлов
+
+    Результат хранится в pickle-файле, имя которого - хэш содержимого файла.
+    Индекс связывает путь файла с его размером, временем изменения и хэшем:
+    если размер и время не изменились, файл не читается вовсе; иначе
+    пересчитывается хэш, и кэш находится, даже если файл был лишь скопирован
+    или пересохранен без изменений. Размер записей ограничен, при превышении
+    удаляются те, что дольше всего не использовались.
+
+    Кэш доверяет своей папке: pickle-файлы из чужих источников класть в нее нельзя.
+    Наследники задают NAME (префикс файлов), TITLE (для сообщений), VERSION и INDEX_NAME.
+    """
+
+    NAME = 'file'
+    TITLE = 'файла'
+    VERSION = 1
+    INDEX_NAME = 'files.json'
+
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, file_manager=None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.file_manager = file_manager or FileManager()
+
+    def load(self, path, read):
+        """Результат из кэша или, при промахе, результат read(path), сохраняемый в кэш"""
+        path = Path(path)
+        if not path.exists():
+            return read(path)
+
+        stat = path.stat()
+        index = self._load_index()
+        key = str(path.resolve())
+        entry = index.get(key)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            content_hash = entry['hash']
+        else:
+            content_hash = self.file_manager.file_hash(path)
+
+        data_path = self._data_path(content_hash)
+        data = self._read_data(data_path)
+        if data is None:
+            data = read(path)
+            self._write_data(data_path, data)
+
+        # Индекс перечитывается перед записью, чтобы не потерять записи,
+        # добавленные другими процессами, пока файл читался
+        index = self._load_index()
+        index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': content_hash}
+        self._evict(index, keep=data_path)
+        self._save_index(index)
+        return data
+
+    def clear(self):
+        """Удаление всех записей кэша"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob(f'{self.NAME}_*.pickle'):
+                with suppress(FileNotFoundError):
+                    path.unlink()
+            with suppress(FileNotFoundError):
+                (self.cache_dir / self.INDEX_NAME).unlink()
+
+    def _data_path(self, content_hash):
+        return self.cache_dir / f"{self.NAME}_v{self.VERSION}_{content_hash}.pickle"
+
+    def _read_data(self, data_path):
+        try:
+            with open(data_path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Кэш {self.TITLE} поврежден и будет пересоздан: {e}")
+            return None
+        # Время изменения служит отметкой последнего использования для вытеснения;
+        # запись могла быть уже вытеснена другим процессом
+        with suppress(FileNotFoundError):
+            os.utime(data_path)
+        return data
+
+    def _write_data(self, data_path, data):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Временный файл свой у каждого процесса: рабочие процессы могут сохранять одну запись одновременно
+            temp_path = data_path.with_name(f"temp_{os.getpid()}_{data_path.name}")
+            with open(temp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, data_path)
+        except OSError as e:
+            print(f"Не удалось сохранить кэш {self.TITLE}: {e}")
+
+    def _evict(self, index, keep):
+        """Удаление давно не использованных записей сверх предельного размера"""
+        if not self.cache_dir.exists():
+            return
+        # Рабочие процессы делят кэш: файл может исчезнуть между поиском и чтением размера
+        files = []
+        for path in self.cache_dir.glob(f'{self.NAME}_*.pickle'):
+            with suppress(FileNotFoundError):
+                stat = path.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, path))
+        files.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in files)
+        removed = set()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= size
+            with suppress(FileNotFoundError):
+                path.unlink()
+            removed.add(path.name)
+
+        # Записи индекса без данных больше не нужны
+        live = {path.name for _, _, path in files} - removed
+        for key in [key for key, entry in index.items() if self._data_path(entry['hash']).name not in live]:
+            del index[key]
+
+    def _load_index(self):
+        try:
+            with open(self.cache_dir / self.INDEX_NAME, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            index_path = self.cache_dir / self.INDEX_NAME
+            temp_path = index_path.with_name(f"temp_{os.getpid()}_{index_path.name}")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"Не удалось сохранить индекс кэша {self.TITLE}: {e}")
+
+
+class RegisterCache(FileCache):
+    """Дисковый кэш разобранных реестров (Register)"""
+
+    NAME = 'register'
+    TITLE = 'реестра'
+    # Меняется вместе с форматом Register или правилами чтения листов
+    VERSION = 4
+    INDEX_NAME = 'index.json'
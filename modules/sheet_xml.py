@@ -0,0 +1,158 @@
+import re
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+from zipfile import ZipFile
+import xml.etree.ElementTree as ET
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+from modules.package import MAIN_NS, REL_NS, WORKBOOK_PART, read_sheets
+
+_SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_ROW_REF_RE = re.compile(r'\br="(\d+)"')
+_CELL_REF_RE = re.compile(r'\br="([A-Z]+)(\d+)"')
+_STYLE_RE = re.compile(r'\ss="\d+"')
+_SPANS_RE = re.compile(r'\sspans="[^"]*"')
+# Формулы, на которые ссылаются другие ячейки: перезапись такой ячейки ломает соседние
+_FORMULA_MASTER_RE = re.compile(r'<f\b[^>]*\bt="(?:shared|array)"[^>]*\bref=')
+# Атрибуты, которые у листов книги должны различаться или относятся к одному листу
+_SHEET_ATTRS_RE = (
+    re.compile(r'\sxr:uid="[^"]*"'),          # идентификатор листа для истории правок
+    re.compile(r'(<sheetPr\b[^>]*?)\scodeName="[^"]*"'),  # имя листа в VBA
+    re.compile(r'(<sheetView\b[^>]*?)\stabSelected="[^"]*"'),  # выделенные листы группируются
+)
+
+
+class TemplateXmlError(ValueError):
+    """Лист шаблона нельзя размножать на уровне XML"""
+
+
+def _cell_xml(ref, style, value):
+    """XML ячейки с записанным значением и стилем ячейки шаблона"""
+    if value is None:
+        return f'<c r="{ref}"{style}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+    if isinstance(value, (datetime, date)):
+        value = value.strftime("%d.%m.%Y")
+    elif isinstance(value, time):
+        value = value.strftime("%H:%M")
+    text = escape(ILLEGAL_CHARACTERS_RE.sub("", str(value)))
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class SheetXmlTemplate:
+    """XML листа шаблона, разрезанный по ячейкам разметки
+
+    Лист шаблона (размеры, объединения, стили ячеек, параметры печати)
+    одинаков для всех актов, поэтому XML листа разбирается один раз и
+    делится на неизменные фрагменты и места ячеек разметки (FillPlan).
+    Лист акта - склейка фрагментов с XML записанных ячеек, без создания
+    объектов openpyxl. Стили ячеек ссылаются на styles.xml шаблона,
+    поэтому книга актов собирается из пакета шаблона (package.write_book).
+
+    Даты без формата в разметке записываются текстом дд.мм.гггг.
+    Не поддерживаются листы со связями (рисунки, примечания, гиперссылки)
+    и ячейки разметки с общими формулами - для них TemplateXmlError.
+    """
+
+    __slots__ = ('part', 'static', 'slots')
+
+    def __init__(self, xml, targets, part=None):
+        self.part = part
+        text = xml.decode('utf-8')
+        if not re.search(rf'<worksheet\b[^>]*\sxmlns="{re.escape(MAIN_NS)}"', text):
+            raise TemplateXmlError("лист шаблона записан с префиксами пространства имен")
+
+        for pattern in _SHEET_ATTRS_RE:
+            text = pattern.sub(r"\1" if pattern.groups else "", text)
+        # Настройки принтера - отдельная часть пакета одного листа, в листах актов не нужны
+        rel_prefix = re.search(rf'\sxmlns:(\w+)="{re.escape(REL_NS)}"', text)
+        if rel_prefix:
+            rel_id = rf'\s{rel_prefix.group(1)}:id="[^"]*"'
+            text = re.sub(rf'(<pageSetup\b[^>]*?){rel_id}', r"\1", text)
+            if re.search(rel_id, text):
+                raise TemplateXmlError("лист шаблона ссылается на рисунки, примечания или гиперссылки")
+
+        match = _SHEET_DATA_RE.search(text)
+        if match is None:
+            raise TemplateXmlError("в листе шаблона нет sheetData")
+        rows = self._rows(match.group(1) or "")
+
+        # Строки и ячейки разметки, которых нет в шаблоне, вставляются пустыми на свои места
+        for row_idx, col_idx in targets:
+            row = rows.setdefault(row_idx, [f' r="{row_idx}"', {}])
+            if col_idx not in row[1]:
+                row[0] = _SPANS_RE.sub("", row[0])
+                row[1][col_idx] = None
+
+        static = []
+        current = [text[:match.start()], "<sheetData>"]
+        slots = []
+        for row_idx in sorted(rows):
+            attrs, cells = rows[row_idx]
+            current.append(f"<row{attrs}>")
+            for col_idx in sorted(cells):
+                raw = cells[col_idx]
+                if (row_idx, col_idx) not in targets:
+                    current.append(raw)
+                    continue
+                ref = f"{get_column_letter(col_idx)}{row_idx}"
+                if raw is not None and _FORMULA_MASTER_RE.search(raw):
+                    raise TemplateXmlError(f"ячейка {ref} содержит общую формулу")
+                style = _STYLE_RE.search(raw.split(">", 1)[0]) if raw else None
+                slots.append(((row_idx, col_idx), ref, style.group(0) if style else "",
+                              (raw or "").encode('utf-8')))
+                static.append("".join(current))
+                current = []
+            current.append("</row>")
+        current += ["</sheetData>", text[match.end():]]
+        static.append("".join(current))
+
+        self.static = tuple(part.encode('utf-8') for part in static)
+        self.slots = tuple(slots)
+
+    @staticmethod
+    def _rows(sheet_data):
+        """Строки sheetData: {номер строки: [атрибуты строки, {номер столбца: XML ячейки}]}"""
+        rows = {}
+        if _ROW_RE.sub("", sheet_data).strip():
+            raise TemplateXmlError("неизвестные элементы в sheetData")
+        for row in _ROW_RE.finditer(sheet_data):
+            attrs, content = row.group(1), row.group(2) or ""
+            row_ref = _ROW_REF_RE.search(attrs)
+            if row_ref is None or _CELL_RE.sub("", content).strip():
+                raise TemplateXmlError("строки листа шаблона без номеров или с неизвестными элементами")
+            cells = {}
+            for cell in _CELL_RE.finditer(content):
+                cell_ref = _CELL_REF_RE.search(cell.group(1))
+                if cell_ref is None:
+                    raise TemplateXmlError("ячейки листа шаблона без адресов")
+                cells[column_index_from_string(cell_ref.group(1))] = cell.group(0)
+            rows[int(row_ref.group(1))] = [attrs, cells]
+        return rows
+
+    @classmethod
+    def load(cls, template_path, plan):
+        """Разбор активного листа файла шаблона для ячеек разметки plan"""
+        with ZipFile(template_path) as archive:
+            sheets = read_sheets(archive)
+            view = ET.fromstring(archive.read(WORKBOOK_PART)).find(f"{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView")
+            active = int(view.get("activeTab", 0)) if view is not None else 0
+            part = sheets[min(active, len(sheets) - 1)][1]
+            return cls(archive.read(part), plan.targets(), part)
+
+    def render(self, values):
+        """XML листа акта: values - {(строка, столбец): значение}; прочие ячейки - как в шаблоне"""
+        static = self.static
+        parts = [static[0]]
+        for index, (key, ref, style, original) in enumerate(self.slots, 1):
+            if key in values:
+                parts.append(_cell_xml(ref, style, values[key]).encode('utf-8'))
+            else:
+                parts.append(original)
+            parts.append(static[index])
+        return b"".join(parts)
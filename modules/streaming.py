@@ -0,0 +1,66 @@
+import openpyxl
+from itertools import groupby
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.worksheet import Worksheet
+from modules.template import apply_print_settings, print_settings
+
+
+class _ActStreamSheet(WriteOnlyWorksheet):
+    """Потоковый лист, принимающий готовые ячейки чернового листа"""
+
+    def _values_to_row(self, cells, row_idx):
+        # Переопределяется внутренний метод WriteOnlyWorksheet openpyxl 3.1
+        # (версия закреплена в requirements.txt).
+        # Ячейки уже содержат координаты и стили выходной книги
+        return cells
+
+
+class StreamingActBook:
+    """Книга актов, листы которой пишутся в пакет xlsx сразу после заполнения
+
+    Акт заполняется на черновом листе, привязанном к потоковой книге,
+    затем переносится во временный файл листа и освобождается.
+    Расход памяти не зависит от числа актов.
+    """
+
+    def __init__(self):
+        self.workbook = openpyxl.Workbook(write_only=True)
+
+    def new_sheet(self, title):
+        """Черновой лист акта, стили которого регистрируются в выходной книге"""
+        return Worksheet(self.workbook, title=title)
+
+    def flush(self, sheet):
+        """Запись заполненного листа в книгу и закрытие потокового листа"""
+        stream_sheet = _ActStreamSheet(self.workbook, title=sheet.title)
+        self.workbook._add_sheet(stream_sheet)
+
+        # Размеры и объединения нужно задать до записи первой строки;
+        # копируются значения, чтобы не держать ссылок на черновой лист
+        for key, dim in sheet.column_dimensions.items():
+            stream_dim = stream_sheet.column_dimensions[key]
+            stream_dim.min, stream_dim.max, stream_dim.width = dim.min, dim.max, dim.width
+        for key, dim in sheet.row_dimensions.items():
+            stream_sheet.row_dimensions[key].height = dim.height
+        stream_sheet.merged_cells.ranges.update(
+            CellRange(merged_range.coord) for merged_range in sheet.merged_cells.ranges
+        )
+        apply_print_settings(stream_sheet, print_settings(sheet))
+
+        rows = {
+            row_idx: [cell for _, cell in cells]
+            for row_idx, cells in groupby(sorted(sheet._cells.items()), key=lambda item: item[0][0])
+        }
+        for row_idx in range(1, sheet.max_row + 1):
+            stream_sheet.append(rows.get(row_idx, []))
+
+        stream_sheet.close()
+
+        # Лист уже во временном файле, описание объединений и размеров больше не нужно
+        stream_sheet.merged_cells.ranges.clear()
+        stream_sheet.column_dimensions.clear()
+        stream_sheet.row_dimensions.clear()
+
+    def close(self):
+        self.workbook.close()
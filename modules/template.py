@@ -0,0 +1,260 @@
+from copy import deepcopy
+from weakref import WeakKeyDictionary
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.styles.named_styles import NamedStyle
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.merge import MergedCellRange
+
+
+def anchor_index(merged_ranges):
+    """Индекс объединений: (строка, столбец) каждой скрытой ячейки -> левая верхняя ячейка
+
+    merged_ranges - границы (min_row, min_col, max_row, max_col). Левые верхние
+    ячейки в индекс не входят, поэтому адрес ячейки для записи -
+    anchors.get(key, key) за O(1) вместо перебора объединений листа.
+    """
+    anchors = {}
+    for min_row, min_col, max_row, max_col in merged_ranges:
+        anchor = (min_row, min_col)
+        for row_idx in range(min_row, max_row + 1):
+            for col_idx in range(min_col, max_col + 1):
+                anchors[row_idx, col_idx] = anchor
+        del anchors[anchor]
+    return anchors
+
+
+def _area(value):
+    """Диапазоны печати без названия листа, например $A$3:$AP$122 вместо '1'!$A$3:$AP$122"""
+    if not value:
+        return None
+    return ','.join(part.rsplit('!', 1)[-1] for part in value.split(','))
+
+
+def print_settings(sheet):
+    """Параметры печати листа в виде, не связанном с листом и книгой"""
+    return {
+        'page_setup': {attr: getattr(sheet.page_setup, attr) for attr in sheet.page_setup.__attrs__},
+        'page_margins': {attr: getattr(sheet.page_margins, attr) for attr in sheet.page_margins.__attrs__},
+        'print_options': {attr: getattr(sheet.print_options, attr) for attr in sheet.print_options.__attrs__},
+        'fit_to_page': sheet.sheet_properties.pageSetUpPr.fitToPage if sheet.sheet_properties.pageSetUpPr else None,
+        'header_footer': sheet.HeaderFooter,
+        'row_breaks': sheet.row_breaks,
+        'col_breaks': sheet.col_breaks,
+        'print_area': _area(sheet.print_area),
+        'print_title_rows': sheet.print_title_rows,
+        'print_title_cols': sheet.print_title_cols,
+    }
+
+
+def apply_print_settings(sheet, settings):
+    """Перенос параметров печати на лист (обычный или потоковый)"""
+    for name in ('page_setup', 'page_margins', 'print_options'):
+        target = getattr(sheet, name)
+        for attr, value in settings[name].items():
+            setattr(target, attr, value)
+    if settings['fit_to_page'] is not None:
+        sheet.page_setup.fitToPage = settings['fit_to_page']
+    # Колонтитулы и разрывы страниц при записи только читаются, поэтому общие для всех листов
+    sheet.HeaderFooter = settings['header_footer']
+    sheet.row_breaks = settings['row_breaks']
+    sheet.col_breaks = settings['col_breaks']
+    if settings['print_area']:
+        sheet.print_area = settings['print_area']
+    if settings['print_title_rows']:
+        sheet.print_title_rows = settings['print_title_rows']
+    if settings['print_title_cols']:
+        sheet.print_title_cols = settings['print_title_cols']
+
+
+class TemplateStamp:
+    """Скомпилированный лист шаблона для быстрого создания листов актов
+
+    Шаблон разбирается один раз: значения ячеек, объединения, размеры
+    столбцов и строк, параметры печати, а стили сводятся к набору уникальных записей
+    вместе с именованными стилями, на которые они ссылаются.
+    Разобранный шаблон сохраняется в кэше (TemplateCache) без разметки и
+    привязок к выходным книгам.
+    Для каждой выходной книги стили регистрируются один раз, после чего
+    листы актов штампуются без копирования объектов стилей: таблицы стилей
+    книги не растут с числом актов.
+    """
+
+    __slots__ = ('cells', 'styles', 'merged_ranges', 'anchors', 'column_widths', 'row_heights', 'print_settings',
+                 'fill_plan', '_bound', '__weakref__')
+    # Поля, сохраняемые в кэше шаблонов
+    STATE = ('cells', 'styles', 'merged_ranges', 'anchors', 'column_widths', 'row_heights', 'print_settings')
+
+    def __init__(self, template_sheet):
+        wb = template_sheet.parent
+        styles = {}
+        cells = []
+        for (row_idx, col_idx), cell in sorted(template_sheet._cells.items()):
+            style_id = None
+            if cell.has_style:
+                style_id = styles.setdefault(self._style_key(wb, cell._style), len(styles))
+
+            if isinstance(cell, MergedCell):
+                cells.append((row_idx, col_idx, None, None, style_id, True))
+            else:
+                cells.append((row_idx, col_idx, cell._value, cell.data_type, style_id, False))
+
+        self.cells = tuple(cells)
+        self.styles = tuple(styles)
+        self.merged_ranges = tuple(
+            (merged_range.min_row, merged_range.min_col, merged_range.max_row, merged_range.max_col)
+            for merged_range in template_sheet.merged_cells.ranges
+        )
+        self.anchors = anchor_index(self.merged_ranges)
+        self.column_widths = tuple(
+            (letter, dim.min, dim.max, dim.width)
+            for letter, dim in template_sheet.column_dimensions.items()
+            if dim.width
+        )
+        self.row_heights = tuple(
+            (row_idx, dim.height)
+            for row_idx, dim in template_sheet.row_dimensions.items()
+            if dim.height is not None
+        )
+        self.print_settings = deepcopy(print_settings(template_sheet))
+        # Разметка заполнения (FillPlan), назначается при загрузке шаблона
+        self.fill_plan = None
+        self._bound = WeakKeyDictionary()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.STATE)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.STATE, state):
+            setattr(self, name, value)
+        self.fill_plan = None
+        self._bound = WeakKeyDictionary()
+
+    @staticmethod
+    def _named_style_key(wb, xf_id):
+        """Описание именованного стиля; None для обычного стиля книги"""
+        if xf_id >= len(wb._named_styles):
+            return None
+        named = wb._named_styles[xf_id]
+        if named.builtinId == 0:
+            return None  # "Обычный" (Normal) есть в любой книге
+        return (
+            named.name, named.font, named.fill, named.border, named.number_format,
+            named.protection, named.alignment, named.builtinId, named.hidden,
+        )
+
+    @classmethod
+    def _style_key(cls, wb, style):
+        """Описание стиля ячейки, не зависящее от индексов книги шаблона"""
+        if style.numFmtId < BUILTIN_FORMATS_MAX_SIZE:
+            number_format = BUILTIN_FORMATS.get(style.numFmtId, 'General')
+        else:
+            number_format = wb._number_formats[style.numFmtId - BUILTIN_FORMATS_MAX_SIZE]
+        return (
+            wb._fonts[style.fontId],
+            wb._fills[style.fillId],
+            wb._borders[style.borderId],
+            number_format,
+            wb._protections[style.protectionId],
+            wb._alignments[style.alignmentId],
+            style.pivotButton,
+            style.quotePrefix,
+            cls._named_style_key(wb, style.xfId),
+        )
+
+    @staticmethod
+    def _bind_named_style(wb, key, named_ids):
+        """Номер именованного стиля в выходной книге; стиль добавляется один раз"""
+        if key is None:
+            return 0
+        name = key[0]
+        if name not in named_ids:
+            if name not in wb.named_styles:
+                font, fill, border, number_format, protection, alignment, builtin_id, hidden = key[1:]
+                wb.add_named_style(NamedStyle(
+                    name=name, font=font, fill=fill, border=border, number_format=number_format,
+                    protection=protection, alignment=alignment, builtinId=builtin_id, hidden=hidden,
+                ))
+            named_ids[name] = wb.named_styles.index(name)
+        return named_ids[name]
+
+    def _bind(self, wb):
+        """Регистрация стилей шаблона в выходной книге (один раз на книгу)
+
+        Одинаковые после регистрации стили сводятся к одной записи, и все
+        записи сразу вносятся в таблицу стилей ячеек книги, поэтому при
+        сохранении каждая ячейка только находит готовую запись.
+        """
+        bound = self._bound.get(wb)
+        if bound is None:
+            bound = []
+            unique = {}
+            named_ids = {}
+            for font, fill, border, number_format, protection, alignment, pivot, quote, named in self.styles:
+                if number_format in BUILTIN_FORMATS_REVERSE:
+                    num_fmt_id = BUILTIN_FORMATS_REVERSE[number_format]
+                else:
+                    num_fmt_id = wb._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+                style = StyleArray([
+                    wb._fonts.add(font),
+                    wb._fills.add(fill),
+                    wb._borders.add(border),
+                    num_fmt_id,
+                    wb._protections.add(protection),
+                    wb._alignments.add(alignment),
+                    pivot,
+                    quote,
+                    self._bind_named_style(wb, named, named_ids),
+                ])
+                style = unique.setdefault(tuple(style), style)
+                wb._cell_styles.add(style)
+                bound.append(style)
+            bound = tuple(bound)
+            self._bound[wb] = bound
+        return bound
+
+    @staticmethod
+    def _merged_range(sheet, bounds):
+        """Объединение на штампованном листе
+
+        Границы правой нижней ячейки уже перенесены в левую верхнюю при чтении
+        шаблона, поэтому повторный расчет MergedCellRange._get_borders не нужен.
+        """
+        min_row, min_col, max_row, max_col = bounds
+        merged_range = MergedCellRange.__new__(MergedCellRange)
+        CellRange.__init__(merged_range, min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row)
+        merged_range.ws = sheet
+        merged_range.start_cell = sheet.cell(row=min_row, column=min_col)
+        return merged_range
+
+    def stamp(self, sheet):
+        """Перенос шаблона на пустой лист"""
+        styles = self._bind(sheet.parent)
+        sheet_cells = sheet._cells
+
+        for row_idx, col_idx, value, data_type, style_id, merged in self.cells:
+            style = styles[style_id] if style_id is not None else None
+            if merged:
+                cell = MergedCell(sheet, row=row_idx, column=col_idx)
+                if style is not None:
+                    cell._style = StyleArray(style)
+            else:
+                cell = Cell(sheet, row=row_idx, column=col_idx, style_array=style)
+                cell._value = value
+                cell.data_type = data_type
+            sheet_cells[(row_idx, col_idx)] = cell
+
+        # Диапазоны шаблона не пересекаются, проверка вхождения при добавлении не нужна
+        sheet.merged_cells.ranges.update(
+            self._merged_range(sheet, bounds) for bounds in self.merged_ranges
+        )
+
+        for letter, min_col, max_col, width in self.column_widths:
+            dim = sheet.column_dimensions[letter]
+            dim.min, dim.max, dim.width = min_col, max_col, width
+
+        for row_idx, height in self.row_heights:
+            sheet.row_dimensions[row_idx].height = height
+
+        apply_print_settings(sheet, self.print_settings)
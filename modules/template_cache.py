@@ -0,0 +1,18 @@
+from modules.register_cache import FileCache
+
+
+class TemplateCache(FileCache):
+    """Дисковый кэш скомпилированных шаблонов (TemplateStamp)
+
+    Разобранный шаблон - значения и стили ячеек, объединения и их индекс,
+    размеры, параметры печати - хранится по хэшу файла шаблона, поэтому
+    повторные запуски и рабочие процессы не открывают xlsx шаблона.
+    Разметка (FillPlan) в кэш не входит: она компилируется заново
+    по индексу объединений из кэша и занимает доли миллисекунды.
+    """
+
+    NAME = 'template'
+    TITLE = 'шаблона'
+    # Меняется вместе с форматом TemplateStamp
+    VERSION = 2
+    INDEX_NAME = 'templates.json'
@@ -0,0 +1,183 @@
+from datetime import datetime
+from operator import attrgetter
+from modules.records import ActRecord
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Заголовки столбцов для сообщений
+_TITLES = {column.field: column.titles[0] for column in ActRecord.COLUMNS}
+
+
+class Problem:
+    """Замечание к реестру: строка листа, акт, столбец, текст и важность"""
+
+    __slots__ = ('sheet', 'row', 'act', 'field', 'message', 'severity')
+
+    def __init__(self, sheet, row, act, field, message, severity=ERROR):
+        self.sheet = sheet
+        self.row = row
+        self.act = act
+        self.field = field
+        self.message = message
+        self.severity = severity
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self):
+        place = f"{self.sheet}, строка {self.row}" if self.row else self.sheet
+        act = f", акт {self.act}" if self.act else ""
+        return f"{place}{act}: {self.message}"
+
+
+class ValidationReport:
+    """Результат проверки реестра
+
+    Ошибки исключают строку из генерации, предупреждения только сообщаются.
+    """
+
+    __slots__ = ('total', 'valid', 'problems')
+
+    def __init__(self, total=0, valid=0, problems=None):
+        self.total = total
+        self.valid = valid
+        self.problems = problems or []
+
+    @property
+    def errors(self):
+        return [problem for problem in self.problems if problem.severity == ERROR]
+
+    @property
+    def warnings(self):
+        return [problem for problem in self.problems if problem.severity == WARNING]
+
+    def summary(self):
+        """Сводка: число строк, прошедших проверку, ошибок и предупреждений"""
+        errors = len(self.errors)
+        return {
+            'total': self.total,
+            'valid': self.valid,
+            'invalid': self.total - self.valid,
+            'errors': errors,
+            'warnings': len(self.problems) - errors,
+        }
+
+    def as_dict(self):
+        return dict(self.summary(), problems=[problem.as_dict() for problem in self.problems])
+
+    def lines(self, limit=None):
+        """Текст отчета для журнала: сводка и замечания (не более limit)"""
+        summary = self.summary()
+        lines = [
+            f"Проверка реестра: строк {summary['total']}, к генерации {summary['valid']}, "
+            f"ошибок {summary['errors']}, предупреждений {summary['warnings']}"
+        ]
+        shown = self.problems if limit is None else self.problems[:limit]
+        lines.extend(f"  {'Ошибка' if problem.severity == ERROR else 'Внимание'}. {problem}" for problem in shown)
+        if len(shown) < len(self.problems):
+            lines.append(f"  ... и еще {len(self.problems) - len(shown)}")
+        return lines
+
+
+class RegisterValidator:
+    """Проверка всех строк листа "Реестр актов" за один проход по столбцам
+
+    Ошибки (строка не генерируется): пустые обязательные поля, значения
+    дат, не являющиеся датами, нарушение порядка дат (начало <= окончание
+    <= дата акта), повтор номера акта (первое вхождение остается).
+    Предупреждения: ссылки на представителей, сертификаты и нормативы,
+    которых нет в справочниках, и организации представителей, которых нет
+    в листе Организации. Для таких актов генератор подставляет значения
+    по умолчанию или оставляет поле как есть.
+    """
+
+    SHEET = 'Реестр актов'
+    DATE_FIELDS = ('start_date', 'end_date', 'act_date')
+    PERSON_FIELDS = ('customer_rep', 'general_contractor_rep', 'supervisor_rep', 'designer_rep', 'contractor_rep')
+    # Поля со списками кодов через ";" и справочники, в которых они ищутся
+    CODE_FIELDS = (('materials', 'certificates', "сертификата"), ('normatives', 'normatives', "норматива"))
+
+    def __init__(self, register):
+        self.register = register
+
+    def validate(self, rows=None, row_numbers=None):
+        """Проверка строк; возвращает (строки без ошибок, ValidationReport)"""
+        register = self.register
+        if rows is None:
+            rows = register.rows
+            row_numbers = getattr(register, 'row_numbers', None)
+        if not row_numbers or len(row_numbers) != len(rows):
+            row_numbers = range(2, len(rows) + 2)  # Первая строка листа - заголовки
+
+        # Значения по столбцам: каждая проверка - один проход по своему столбцу
+        fields = {'act_id', 'suffix', *self.DATE_FIELDS, *self.PERSON_FIELDS}
+        fields.update(column.field for column in ActRecord.COLUMNS if column.required)
+        fields.update(field for field, _, _ in self.CODE_FIELDS)
+        columns = {field: list(map(attrgetter(field), rows)) for field in fields}
+        akt_ids = [f"{act_id}-{suffix}" for act_id, suffix in zip(columns['act_id'], columns['suffix'])]
+        problems = []
+        invalid = set()
+
+        def report(index, field, message, severity=ERROR):
+            problems.append(Problem(self.SHEET, row_numbers[index], akt_ids[index], _TITLES.get(field, field),
+                                    message, severity))
+            if severity == ERROR:
+                invalid.add(index)
+
+        for column in ActRecord.COLUMNS:
+            if column.required:
+                for index, value in enumerate(columns[column.field]):
+                    if value is None or (isinstance(value, str) and not value.strip()):
+                        report(index, column.field, f"не заполнено поле \"{column.titles[0]}\"")
+
+        dates = {}
+        for field in self.DATE_FIELDS:
+            values = columns[field]
+            for index, value in enumerate(values):
+                if value not in (None, '') and not isinstance(value, datetime):
+                    report(index, field, f"\"{_TITLES[field]}\" не является датой: {value!r}")
+            dates[field] = [value if isinstance(value, datetime) else None for value in values]
+
+        for index, (start, end, act) in enumerate(zip(dates['start_date'], dates['end_date'], dates['act_date'])):
+            if start and end and start > end:
+                report(index, 'end_date',
+                       f"дата начала {start:%d.%m.%Y} позже даты окончания {end:%d.%m.%Y}")
+            last = end or start
+            if last and act and last > act:
+                report(index, 'act_date', f"дата акта {act:%d.%m.%Y} раньше окончания работ {last:%d.%m.%Y}")
+
+        first = {}
+        for index, akt_id in enumerate(akt_ids):
+            if akt_id in first:
+                report(index, 'act_id', f"номер акта повторяет строку {row_numbers[first[akt_id]]}")
+            else:
+                first[akt_id] = index
+
+        for field in self.PERSON_FIELDS:
+            for index, person_id in enumerate(columns[field]):
+                if person_id and person_id not in register.personnel:
+                    report(index, field, f"представитель {person_id} не найден в листе Персоналии", WARNING)
+
+        for field, lookup, title in self.CODE_FIELDS:
+            known = getattr(register, lookup)
+            if not known:
+                continue  # Справочник не заполнен - сверять не с чем
+            for index, value in enumerate(columns[field]):
+                if isinstance(value, str):
+                    for code in value.split(';'):
+                        code = code.strip()
+                        if code and code not in known:
+                            report(index, field, f"код {title} {code} не найден в справочнике", WARNING)
+
+        organizations = register.organizations
+        names = {org.name for org in organizations.values()}
+        for person in register.personnel.values():
+            if person.organization and person.organization not in organizations and person.organization not in names:
+                problems.append(Problem('Персоналии', None, None, 'Организация',
+                                        f"организация {person.organization} представителя {person.id} "
+                                        f"не найдена в листе Организации", WARNING))
+
+        problems.sort(key=lambda problem: (problem.sheet != self.SHEET, problem.row or 0))
+        valid_rows = [row for index, row in enumerate(rows) if index not in invalid]
+        return valid_rows, ValidationReport(len(rows), len(valid_rows), problems)
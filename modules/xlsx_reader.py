@@ -0,0 +1,189 @@
+import posixpath
+from xml.etree.ElementTree import fromstring, iterparse
+from zipfile import ZipFile
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_ROW = _MAIN + 'row'
+_VALUE = _MAIN + 'v'
+_INLINE = _MAIN + 'is'
+_TEXT = _MAIN + 't'
+_RUN = _MAIN + 'r'
+_DIGITS = '0123456789'
+
+
+def _rels_path(part):
+    """Файл связей части пакета: xl/workbook.xml -> xl/_rels/workbook.xml.rels"""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', f"{name}.rels")
+
+
+def _target(part, target):
+    """Путь цели связи относительно части пакета"""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+def _cast_number(value):
+    # Как openpyxl: целое без точки и экспоненты, иначе float
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def _inline_text(element):
+    """Текст встроенной строки: основной текст и тексты фрагментов (фонетика пропускается)"""
+    inline = element.find(_INLINE)
+    if inline is None:
+        return None
+    if len(inline) == 1 and inline[0].tag == _TEXT:
+        return inline[0].text or ''
+    plain = []
+    runs = []
+    for child in inline:
+        if child.tag == _TEXT:
+            plain.append(child.text or '')
+        elif child.tag == _RUN:
+            text = child.find(_TEXT)
+            if text is not None:
+                runs.append(text.text or '')
+    return ''.join(plain + runs)
+
+
+class XlsxReader:
+    """Потоковое чтение значений листов xlsx без объектов openpyxl
+
+    XML листа разбирается прямо из zip-архива инкрементальным парсером,
+    строки возвращаются кортежами значений. Общие строки, стили дат и
+    система дат (1900/1904) читаются из пакета, поэтому значения совпадают
+    с load_workbook(data_only=True): даты - datetime, числа - int или float,
+    для формул - сохраненный результат. Стили, объединения и размеры не читаются.
+    """
+
+    def __init__(self, path):
+        self.archive = ZipFile(path)
+        try:
+            self._read_workbook()
+        except Exception:
+            self.archive.close()
+            raise
+
+    def _read_workbook(self):
+        archive = self.archive
+        root_rels = fromstring(archive.read('_rels/.rels'))
+        workbook_part = next(
+            _target('', rel.get('Target'))
+            for rel in root_rels.iter(_RELS + 'Relationship')
+            if rel.get('Type') == f"{_DOC_RELS}/officeDocument"
+        )
+        rels = {
+            rel.get('Id'): (rel.get('Type'), _target(workbook_part, rel.get('Target')))
+            for rel in fromstring(archive.read(_rels_path(workbook_part))).iter(_RELS + 'Relationship')
+        }
+
+        workbook = fromstring(archive.read(workbook_part))
+        properties = workbook.find(_MAIN + 'workbookPr')
+        date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+        self.epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        # Листы в порядке книги; листы диаграмм не читаются
+        self._sheets = {}
+        for sheet in workbook.iter(_MAIN + 'sheet'):
+            kind, part = rels.get(sheet.get(f"{{{_DOC_RELS}}}id"), (None, None))
+            if kind == f"{_DOC_RELS}/worksheet":
+                self._sheets[sheet.get('name')] = part
+        self.sheetnames = list(self._sheets)
+
+        self.shared_strings = []
+        for kind, part in rels.values():
+            if kind == f"{_DOC_RELS}/sharedStrings":
+                with archive.open(part) as source:
+                    self.shared_strings = read_string_table(source)
+
+        # Номера стилей с форматами дат и длительностей, как в openpyxl
+        self.date_formats = set()
+        self.timedelta_formats = set()
+        for kind, part in rels.values():
+            if kind == f"{_DOC_RELS}/styles":
+                stylesheet = Stylesheet.from_tree(fromstring(archive.read(part)))
+                self.date_formats = stylesheet.date_formats
+                self.timedelta_formats = stylesheet.timedelta_formats
+
+    def iter_rows(self, name):
+        """Строки листа кортежами значений
+
+        Пропущенные в файле строки возвращаются пустыми кортежами, чтобы
+        номер строки листа совпадал с порядковым номером кортежа.
+        """
+        shared_strings = self.shared_strings
+        date_formats = self.date_formats
+        timedelta_formats = self.timedelta_formats
+        epoch = self.epoch
+        dates = {}
+
+        with self.archive.open(self._sheets[name]) as source:
+            row_counter = 0
+            for _, element in iterparse(source):
+                if element.tag != _ROW:
+                    continue
+
+                row_idx = element.get('r')
+                row_idx = int(row_idx) if row_idx else row_counter + 1
+                while row_counter < row_idx - 1:
+                    row_counter += 1
+                    yield ()
+                row_counter = row_idx
+
+                values = []
+                for cell in element:
+                    coordinate = cell.get('r')
+                    if coordinate:
+                        column = column_index_from_string(coordinate.rstrip(_DIGITS))
+                        if column > len(values) + 1:
+                            values.extend([None] * (column - len(values) - 1))
+
+                    data_type = cell.get('t', 'n')
+                    if data_type == 'inlineStr':
+                        value = _inline_text(cell)
+                    else:
+                        value = cell.findtext(_VALUE) or None
+                        if value is None:
+                            pass
+                        elif data_type == 'n':
+                            value = _cast_number(value)
+                            style_id = int(cell.get('s', 0))
+                            if style_id in date_formats:
+                                key = (value, style_id)
+                                if key not in dates:
+                                    try:
+                                        dates[key] = from_excel(value, epoch,
+                                                                timedelta=style_id in timedelta_formats)
+                                    except (OverflowError, ValueError):
+                                        dates[key] = "#VALUE!"
+                                value = dates[key]
+                        elif data_type == 's':
+                            value = shared_strings[int(value)]
+                        elif data_type == 'b':
+                            value = bool(int(value))
+                        elif data_type == 'd':
+                            value = from_ISO8601(value)
+                    values.append(value)
+
+                element.clear()
+                yield tuple(values)
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import Шаблон
+from modules.act_processor import ActProcessor
+
+TEMPLATE = BASE_DIR / 'data' / 'Шаблон.xlsx'
+
+
+@pytest.fixture(scope='session')
+def register_path(tmp_path_factory):
+    """Синтетический реестр на 30 актов с датами-ячейками"""
+    path = tmp_path_factory.mktemp('register') / 'Реестр.xlsx'
+    assert Шаблон.create_aosr_register(path, acts_count=30, dates_as_text=False, verbose=False)
+    return path
+
+
+@pytest.fixture
+def processor():
+    # Без дискового кэша: тесты не пишут в папку cache проекта
+    return ActProcessor(use_cache=False)
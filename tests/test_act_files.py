@@ -0,0 +1,19 @@
+from copy import copy
+from zipfile import ZipFile
+from conftest import TEMPLATE
+
+
+def test_failed_act_leaves_no_file(processor, register_path, tmp_path):
+    rows = [copy(row) for row in processor.process_register(register_path)[:3]]
+    rows[1].work_name = "Работы\x07"  # недопустимый в xlsx символ: заполнение акта падает
+    output = tmp_path / "Акты"
+    bundle = tmp_path / "Акты.zip"
+
+    result = processor.generate_act_files(rows, TEMPLATE, output, folders=True, bundle_path=bundle)
+
+    assert (result['status'], result['total'], result['success']) == ('success', 3, 2)
+    on_disk = sorted(path for path in output.rglob('*') if path.is_file())
+    assert on_disk == sorted(result['files'])
+    assert len({path.parent for path in on_disk}) == len([path for path in output.iterdir()]) == 2
+    with ZipFile(bundle) as archive:
+        assert sorted(archive.namelist()) == sorted(path.relative_to(output).as_posix() for path in on_disk)
@@ -0,0 +1,45 @@
+import pytest
+import cli
+from conftest import TEMPLATE
+from modules.act_processor import ActProcessor
+
+
+@pytest.mark.parametrize('flags', [
+    ['--incremental', '--workers', '2'],
+    ['--incremental', '--clone'],
+    ['--per-act', '--streaming'],
+    ['--per-act', '--clone'],
+    ['--per-act', '--incremental'],
+    ['--bundle', 'Акты.zip'],
+    ['--folders'],
+    ['--per-act', '--certificates', 'Сертификаты'],
+])
+def test_ignored_flag_combinations_are_rejected(flags):
+    with pytest.raises(SystemExit) as error:
+        cli.parse_args(['Реестр.xlsx', 'Шаблон.xlsx', 'Акты'] + flags)
+    assert error.value.code == 2
+
+
+def _main(register_path, output, *flags):
+    return cli.main([str(register_path), str(TEMPLATE), str(output), '--no-cache', *flags])
+
+
+def test_exit_codes(register_path, tmp_path, monkeypatch):
+    assert _main(register_path, tmp_path / "Акты.xlsx", '--limit', '3') == cli.EXIT_OK
+    assert _main(register_path, tmp_path / "Акты.xlsx", '--act', 'НЕТ-ТАКОГО') == cli.EXIT_ERROR
+
+    fill = ActProcessor._fill_akt_data
+
+    def fail_second(self, sheet, row, plan):
+        if row is self.register.rows[1]:
+            raise ValueError("ошибка заполнения")
+        return fill(self, sheet, row, plan)
+
+    monkeypatch.setattr(ActProcessor, '_fill_akt_data', fail_second)
+    assert _main(register_path, tmp_path / "Акты.xlsx", '--limit', '3') == cli.EXIT_PARTIAL
+
+    def interrupt(args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli, 'run', interrupt)
+    assert _main(register_path, tmp_path / "Акты.xlsx") == cli.EXIT_INTERRUPTED
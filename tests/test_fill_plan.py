@@ -0,0 +1,66 @@
+from datetime import datetime
+from operator import itemgetter
+import openpyxl
+import pytest
+from modules.fill_plan import FillPlan, FillPlanError
+from modules.template import anchor_index
+
+# Объединения B2:D3 и F5:F6
+ANCHORS = anchor_index(((2, 2, 3, 4), (5, 6, 6, 6)))
+
+
+def _plan(cells, signatories=None, roles=()):
+    spec = {'cells': cells, 'signatories': signatories or {}}
+    return FillPlan(spec, ANCHORS, roles=roles, accessor=itemgetter)
+
+
+def test_cells_inside_merges_are_written_to_the_anchor():
+    plan = _plan([
+        {'cell': 'C3', 'field': 'akt_id'},
+        {'cell': 'F6', 'field': 'act_date', 'format': 'date'},
+        {'cell': 'A1', 'text': "Акт {akt_id} от {act_date:%d.%m.%Y}"},
+        {'cell': 'H1', 'value': 2},
+    ])
+    item = {'akt_id': "АСР-1", 'act_date': datetime(2023, 5, 4)}
+
+    assert list(plan.values(item)) == [(2, 2, "АСР-1"), (5, 6, "04.05.2023"), (1, 1, "Акт АСР-1 от 04.05.2023"),
+                                       (1, 8, 2)]
+    assert plan.targets() == {(2, 2), (5, 6), (1, 1), (1, 8)}
+
+    sheet = openpyxl.Workbook().active
+    assert plan.fill(sheet, item) == 4
+    assert sheet['B2'].value == "АСР-1" and sheet['C3'].value is None
+
+
+def test_two_cells_resolving_to_one_target_are_rejected():
+    with pytest.raises(FillPlanError, match="ячейки B2 и D3 указывают на одну ячейку"):
+        _plan([{'cell': 'B2', 'field': 'akt_id'}, {'cell': 'D3', 'field': 'work_name'}])
+    with pytest.raises(FillPlanError, match="C3 и B3"):
+        _plan([{'cell': 'C3', 'field': 'akt_id'}], {'Заказчик': {'organization': ['B3']}}, roles=('Заказчик',))
+
+
+def test_skip_empty_keeps_the_template_value():
+    plan = _plan([
+        {'cell': 'A1', 'field': 'notes', 'skip_empty': True},
+        {'cell': 'A2', 'field': 'schemes'},
+    ])
+    assert list(plan.values({'notes': None, 'schemes': None})) == [(2, 1, None)]
+    assert list(plan.values({'notes': "Примечание", 'schemes': "Схема"})) == [(1, 1, "Примечание"), (2, 1, "Схема")]
+
+
+def test_signatory_cells_without_data_are_cleared():
+    plan = _plan([], {'Заказчик': {'organization': ['A10', 'A11'], 'representative': ['A12']}},
+                 roles=('Заказчик', 'Технадзор'))
+    assert list(plan.values({}, ((("ООО Ромашка",), ()), ((), ())))) == [(10, 1, "ООО Ромашка"), (11, 1, None),
+                                                                         (12, 1, None)]
+
+
+def test_plan_errors():
+    with pytest.raises(FillPlanError, match="неверная ячейка"):
+        _plan([{'cell': '1A', 'field': 'akt_id'}])
+    with pytest.raises(FillPlanError, match="неизвестный формат"):
+        _plan([{'cell': 'A1', 'field': 'akt_id', 'format': 'money'}])
+    with pytest.raises(FillPlanError, match="не указано значение"):
+        _plan([{'cell': 'A1'}])
+    with pytest.raises(FillPlanError, match="неизвестные подписанты: Инвестор"):
+        _plan([], {'Инвестор': {}}, roles=('Заказчик',))
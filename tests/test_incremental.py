@@ -0,0 +1,76 @@
+from copy import copy
+import openpyxl
+from conftest import TEMPLATE
+from modules.incremental import manifest_path
+
+
+def _values(path):
+    wb = openpyxl.load_workbook(path)
+    return {ws.title: [row for row in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+def test_splice_matches_full_generation(processor, register_path, tmp_path):
+    rows = processor.process_register(register_path)[:12]
+    output = tmp_path / "Акты.xlsx"
+
+    first = processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)
+    assert (first['status'], first['rendered'], first['reused']) == ('success', 12, 0)
+
+    changed = list(rows)
+    edited = copy(changed[3])
+    edited.work_name = "Измененное наименование работ"
+    changed[3] = edited
+    del changed[7]
+
+    result = processor.generate_all_akts(changed, TEMPLATE, output, incremental=True)
+    assert result['status'] == 'success'
+    assert (result['rendered'], result['reused'], result['removed']) == (1, 10, 1)
+
+    full = tmp_path / "Полная.xlsx"
+    assert processor.generate_all_akts(changed, TEMPLATE, full)['status'] == 'success'
+
+    spliced_values = _values(output)
+    assert list(spliced_values) == [f"Акт {processor.akt_id(row)}"[:31] for row in changed]
+    assert spliced_values == _values(full)
+    assert any("Измененное наименование работ" in row for row in spliced_values[f"Акт {processor.akt_id(edited)}"[:31]])
+
+    unchanged = processor.generate_all_akts(changed, TEMPLATE, output, incremental=True)
+    assert (unchanged['rendered'], unchanged['reused'], unchanged['removed']) == (0, 11, 0)
+
+
+def test_rewritten_book_is_regenerated(processor, register_path, tmp_path):
+    rows = processor.process_register(register_path)[:10]
+    output = tmp_path / "Акты.xlsx"
+    assert processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)['status'] == 'success'
+
+    # Обычная генерация в тот же файл удаляет манифест
+    assert processor.generate_all_akts(rows[:3], TEMPLATE, output)['status'] == 'success'
+    assert not manifest_path(output).exists()
+    result = processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)
+    assert (result['rendered'], result['reused']) == (10, 0)
+    assert len(_values(output)) == 10
+
+    # Книга, перезаписанная в обход генератора, не совпадает с отметкой в манифесте
+    processor.render_book(rows[:3], processor.load_template(TEMPLATE), output)
+    result = processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)
+    assert (result['rendered'], result['reused']) == (10, 0)
+    assert len(_values(output)) == 10
+
+
+def test_failed_act_has_no_sheet(processor, register_path, tmp_path):
+    rows = [copy(row) for row in processor.process_register(register_path)[:3]]
+    rows[1].work_name = "Работы\x07"  # недопустимый в xlsx символ: заполнение акта падает
+    output = tmp_path / "Акты.xlsx"
+
+    first = processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)
+    assert (first['status'], first['success']) == ('success', 2)
+    titles = [f"Акт {processor.akt_id(row)}"[:31] for row in (rows[0], rows[2])]
+    assert list(_values(output)) == titles
+
+    rows[0].work_name = "Измененное наименование работ"
+    result = processor.generate_all_akts(rows, TEMPLATE, output, incremental=True)
+    assert (result['rendered'], result['reused']) == (1, 1)
+
+    full = tmp_path / "Полная.xlsx"
+    assert processor.generate_all_akts([rows[0], rows[2]], TEMPLATE, full)['status'] == 'success'
+    assert _values(output) == _values(full)
@@ -0,0 +1,32 @@
+from copy import copy
+
+
+def test_indexes_group_in_sheet_order(processor, register_path):
+    register = processor.load_source_data(register_path)
+
+    for org_type, orgs in processor.organizations_by_type.items():
+        assert orgs == [org for org in register.organizations.values() if org.type == org_type]
+    assert sum(map(len, processor.organizations_by_type.values())) == len(register.organizations)
+
+    for role, persons in processor.personnel_by_role.items():
+        assert persons == [person for person in register.personnel.values() if person.role == role]
+    assert sum(map(len, processor.personnel_by_role.values())) == len(register.personnel)
+
+
+def test_indexes_follow_the_loaded_register(processor, register_path):
+    register = copy(processor.load_source_data(register_path))
+    customer = processor.organizations_by_type['Заказчик'][0]
+    register.organizations = {id: org for id, org in register.organizations.items() if org is not customer}
+    register.personnel = dict(register.personnel)
+    first_rep = processor.personnel_by_role['Заказчик'][0]
+    del register.personnel[first_rep.id]
+
+    processor.use_register(register)
+
+    assert 'Заказчик' not in processor.organizations_by_type
+    assert first_rep not in processor.personnel_by_role['Заказчик']
+    # Без указанного представителя берется первый с нужной причастностью
+    index = [role for role, _ in processor.SIGNATORIES].index('Заказчик')
+    org_values, rep_values = processor._resolve_signatory(index, None, None)
+    assert org_values == ()
+    assert rep_values[-1] == processor.personnel_by_role['Заказчик'][0].name
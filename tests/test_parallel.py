@@ -0,0 +1,24 @@
+import openpyxl
+from conftest import TEMPLATE
+from modules.parallel import shard_path, split_rows
+
+
+def test_split_rows_keeps_register_order():
+    rows = list(range(11))
+    parts = split_rows(rows, 3)
+    assert [len(part) for part in parts] == [4, 4, 3]
+    assert [row for part in parts for row in part] == rows
+    assert split_rows(rows[:2], 3) == [[0], [1], []]
+
+
+def test_shard_files_follow_register_order(processor, register_path, tmp_path):
+    rows = processor.process_register(register_path)[:9]
+    output = tmp_path / "Акты.xlsx"
+
+    result = processor.generate_all_akts(rows, TEMPLATE, output, workers=2)
+
+    assert result['status'] == 'success'
+    assert result['files'] == [shard_path(output, 1), shard_path(output, 2)]
+    assert shard_path(output, 1).name == "Акты_01.xlsx"
+    titles = [title for path in result['files'] for title in openpyxl.load_workbook(path, read_only=True).sheetnames]
+    assert titles == [f"Акт {processor.akt_id(row)}"[:31] for row in rows]
@@ -0,0 +1,33 @@
+from datetime import datetime
+import pytest
+from modules.records import ActRecord, ColumnMap, Person, SchemaError
+
+
+def test_columns_are_found_by_header_in_any_order():
+    columns = ColumnMap(Person, (' причастность ', 'ФИО', 'Лишний столбец', 'ID', 'Действует с'))
+    person = columns.make(('Заказчик', 'Иванов И.И.', 'не читается', 'PERS-01', '01.02.2023'))
+
+    assert (person.id, person.name, person.role) == ('PERS-01', 'Иванов И.И.', 'Заказчик')
+    assert person.position is None and person.phone is None
+    assert person.active_from == datetime(2023, 2, 1)
+    # Короткая строка дополняется пустыми значениями
+    assert columns.make(('Заказчик',)).id is None
+
+
+def test_synonym_headers():
+    columns = ColumnMap(ActRecord, ('ID акта', 'Наименование работ', 'Дата акта', 'Номер п/п', 'Исп. схема',
+                                    'Нормативы', 'Примечание', 'Представитель технадзора'))
+    assert [columns.indexes[name] for name in ('number', 'schemes', 'normatives', 'notes', 'supervisor_rep')] == \
+        [3, 4, 5, 6, 7]
+
+
+def test_unknown_headers_fall_back_to_column_order():
+    columns = ColumnMap(Person, ('a', 'b', 'c'))
+    assert columns.make(('PERS-01', 'Иванов И.И.', 'Инженер')).position == 'Инженер'
+
+
+def test_schema_errors():
+    with pytest.raises(SchemaError, match='Лист "Персоналии": нет столбцов: Причастность'):
+        ColumnMap(Person, ('ID', 'ФИО', 'Должность'), 'Персоналии')
+    with pytest.raises(SchemaError, match='повторяются столбцы: фио'):
+        ColumnMap(Person, ('ID', 'ФИО', 'Причастность', 'фио'), 'Персоналии')
@@ -0,0 +1,51 @@
+import os
+import shutil
+from modules.register_cache import RegisterCache
+
+
+class CountingReader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return {'content': path.read_bytes(), 'call': self.calls}
+
+
+def test_hit_and_invalidation(tmp_path):
+    cache = RegisterCache(tmp_path / 'cache')
+    read = CountingReader()
+    register = tmp_path / "Реестр.xlsx"
+    register.write_bytes(b"first")
+
+    assert cache.load(register, read) == {'content': b"first", 'call': 1}
+    assert cache.load(register, read)['call'] == 1
+    # Файл, сохраненный заново без изменений, находится по хэшу содержимого
+    stat = register.stat()
+    os.utime(register, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.load(register, read)['call'] == 1
+    copied = tmp_path / "Копия.xlsx"
+    shutil.copy(register, copied)
+    assert cache.load(copied, read)['call'] == 1
+
+    register.write_bytes(b"second")
+    assert cache.load(register, read) == {'content': b"second", 'call': 2}
+    assert cache.load(register, read)['call'] == 2
+    assert read.calls == 2
+
+    cache.clear()
+    assert cache.load(register, read)['call'] == 3
+
+
+def test_eviction_keeps_the_current_entry(tmp_path):
+    cache = RegisterCache(tmp_path / 'cache', max_bytes=1)
+    read = CountingReader()
+    first, second = tmp_path / "1.xlsx", tmp_path / "2.xlsx"
+    first.write_bytes(b"first")
+    second.write_bytes(b"second")
+
+    cache.load(first, read)
+    cache.load(second, read)
+    assert len(list((tmp_path / 'cache').glob('register_*.pickle'))) == 1
+    assert cache.load(second, read)['call'] == 2
+    assert cache.load(first, read)['call'] == 3
@@ -0,0 +1,49 @@
+from copy import copy
+from io import BytesIO
+import openpyxl
+import pytest
+from conftest import TEMPLATE
+
+
+def test_find_act_by_any_number(processor, register_path):
+    rows = processor.process_register(register_path)
+    row = rows[4]
+
+    assert processor.find_act(processor.akt_id(row)) is row
+    assert processor.find_act(f" {row.act_id} ") is row
+    assert processor.find_act(f"{row.suffix}-{row.number}") is row
+    assert processor.find_act("НЕТ-ТАКОГО") is None
+
+
+def test_full_number_wins_and_missing_parts_are_not_keys(processor, register_path):
+    rows = [copy(row) for row in processor.process_register(register_path)[:3]]
+    rows[1].act_id = processor.akt_id(rows[0])  # краткий номер второго совпадает с полным номером первого
+    rows[2].suffix = None
+    processor.index_acts(rows)
+
+    assert processor.find_act(processor.akt_id(rows[0])) is rows[0]
+    assert processor.find_act(rows[2].act_id) is rows[2]
+    assert processor.find_act(f"None-{rows[2].number}") is None
+    rows[2].number = None
+    processor.index_acts(rows)
+    assert "None-None" not in processor.acts_by_id
+
+
+def test_render_one_keeps_recent_books(processor, register_path):
+    rows = processor.process_register(register_path)
+    processor.RENDERED_CACHE_SIZE = 2
+    ids = [processor.akt_id(row) for row in rows[:3]]
+
+    data = processor.render_one(rows[0].act_id, TEMPLATE)
+    book = openpyxl.load_workbook(BytesIO(data))
+    assert book.sheetnames == [f"Акт {ids[0]}"]
+    assert processor.render_one(ids[0], TEMPLATE) is data
+    assert processor.metrics.summary()['counters']['rendered_cache_hits'] == 1
+
+    processor.render_one(ids[1], TEMPLATE)
+    processor.render_one(ids[0], TEMPLATE)  # последний использованный остается в кэше
+    processor.render_one(ids[2], TEMPLATE)
+    assert list(processor._rendered) == [ids[0], ids[2]]
+
+    with pytest.raises(KeyError):
+        processor.render_one("НЕТ-ТАКОГО", TEMPLATE)
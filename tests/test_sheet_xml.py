@@ -0,0 +1,84 @@
+from datetime import datetime
+from zipfile import ZipFile
+import openpyxl
+import pytest
+from openpyxl.comments import Comment
+from conftest import TEMPLATE
+from modules.package import write_book
+from modules.sheet_xml import SheetXmlTemplate, TemplateXmlError
+
+SHEET = (b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+         b'<sheetData><row r="1"><c r="A1" s="1"><v>1</v></c><c r="B1"><v>2</v></c></row></sheetData>'
+         b'</worksheet>')
+
+
+def test_render_replaces_only_plan_cells():
+    template = SheetXmlTemplate(SHEET, {(1, 2), (3, 1)})
+    xml = template.render({(1, 2): "Акт", (3, 1): datetime(2023, 5, 4)}).decode('utf-8')
+    assert '<c r="A1" s="1"><v>1</v></c>' in xml
+    assert '<c r="B1" t="inlineStr"><is><t xml:space="preserve">Акт</t></is></c>' in xml
+    assert '<row r="3"><c r="A3" t="inlineStr"><is><t xml:space="preserve">04.05.2023</t></is></c></row>' in xml
+    # Ячейка без значения остается как в шаблоне
+    assert '<c r="B1"><v>2</v></c>' in template.render({}).decode('utf-8')
+
+
+@pytest.mark.parametrize('xml, message', [
+    (SHEET.replace(b'xmlns="', b'xmlns:x="'), "префиксами"),
+    (SHEET.replace(b'<sheetData>', b'<sheetData><mystery/>'), "неизвестные элементы"),
+    (SHEET.replace(b'</sheetData>', b'</sheetData><drawing r:id="rId1"/>').replace(
+        b'main">', b'main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'),
+     "рисунки"),
+    (SHEET.replace(b'<v>2</v>', b'<f t="shared" ref="B1:B2" si="0">A1</f><v>2</v>'), "общую формулу"),
+])
+def test_unsupported_sheets_raise(xml, message):
+    with pytest.raises(TemplateXmlError, match=message):
+        SheetXmlTemplate(xml, {(1, 2)})
+
+
+def test_cloned_book_matches_openpyxl_book(processor, register_path, tmp_path):
+    rows = processor.process_register(register_path)[:3]
+    cloned, regular = tmp_path / "Клон.xlsx", tmp_path / "Акты.xlsx"
+
+    assert processor.generate_all_akts(rows, TEMPLATE, cloned, clone=True)['success'] == 3
+    assert 'clone' in processor.metrics.summary()['stages']
+    assert processor.generate_all_akts(rows, TEMPLATE, regular)['success'] == 3
+
+    targets = processor.load_template(TEMPLATE).fill_plan.targets()
+    cloned_book, regular_book = openpyxl.load_workbook(cloned), openpyxl.load_workbook(regular)
+    assert cloned_book.sheetnames == regular_book.sheetnames
+    for title in cloned_book.sheetnames:
+        cloned_sheet, regular_sheet = cloned_book[title], regular_book[title]
+        assert {str(merged) for merged in cloned_sheet.merged_cells.ranges} == \
+            {str(merged) for merged in regular_sheet.merged_cells.ranges}
+        for row_idx, col_idx in targets:
+            value = regular_sheet.cell(row=row_idx, column=col_idx).value
+            if isinstance(value, datetime):
+                value = value.strftime("%d.%m.%Y")
+            assert cloned_sheet.cell(row=row_idx, column=col_idx).value == value, (row_idx, col_idx)
+
+
+def test_write_book_keeps_template_parts(tmp_path):
+    output = tmp_path / "Книга.xlsx"
+    with ZipFile(TEMPLATE) as template:
+        part = [name for name in template.namelist() if name.startswith('xl/worksheets/sheet')][0]
+        write_book(output, template, [("Первый", template, part), ("Второй", template, part, lambda: None),
+                                      ("Третий", template, part, lambda: template.read(part))])
+        with ZipFile(output) as book:
+            assert book.read('xl/styles.xml') == template.read('xl/styles.xml')
+    assert openpyxl.load_workbook(output).sheetnames == ["Первый", "Третий"]
+
+
+def test_unclonable_template_falls_back_to_openpyxl(processor, register_path, tmp_path, capsys):
+    wb = openpyxl.load_workbook(TEMPLATE)
+    wb.active['A1'].comment = Comment("Примечание", "Автор")
+    template = tmp_path / "Шаблон.xlsx"
+    wb.save(template)
+    (tmp_path / "Шаблон.fill.json").write_bytes(TEMPLATE.with_name("Шаблон.fill.json").read_bytes())
+    rows = processor.process_register(register_path)[:2]
+    processor.metrics.reset()
+
+    result = processor.generate_all_akts(rows, template, tmp_path / "Акты.xlsx", clone=True)
+
+    assert (result['status'], result['success']) == ('success', 2)
+    assert "нельзя размножить на уровне XML" in capsys.readouterr().out
+    assert 'clone' not in processor.metrics.summary()['stages']
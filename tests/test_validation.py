@@ -0,0 +1,31 @@
+from copy import copy
+from datetime import timedelta
+from modules.validation import ERROR, WARNING, RegisterValidator
+
+
+def test_generated_register_is_valid(processor, register_path):
+    rows = processor.process_register(register_path)
+    report = processor.validation_report
+    assert report.errors == []
+    assert len(rows) == report.total == report.valid == 30
+
+
+def test_errors_exclude_rows_and_warnings_do_not(processor, register_path):
+    register = processor.load_source_data(register_path)
+    rows = [copy(row) for row in register.rows[:6]]
+    rows[0].work_name = "  "                                   # пустое обязательное поле
+    rows[1].start_date = rows[1].end_date + timedelta(days=1)  # начало позже окончания
+    rows[2].act_date = "вчера"                                 # не дата
+    rows[4].act_id, rows[4].suffix = rows[3].act_id, rows[3].suffix  # повтор номера
+    rows[5].customer_rep = "НЕТ-ТАКОГО"                        # неизвестный представитель
+
+    valid, report = RegisterValidator(register).validate(rows, list(range(2, 8)))
+
+    assert valid == [rows[3], rows[5]]
+    assert sorted({problem.row for problem in report.errors}) == [2, 3, 4, 6]
+    assert all(problem.severity == ERROR for problem in report.errors)
+    warnings = report.warnings
+    assert [problem.row for problem in warnings] == [7]
+    assert warnings[0].severity == WARNING
+    assert report.summary() == {'total': 6, 'valid': 2, 'invalid': 4, 'errors': 4, 'warnings': 1}
+    assert "повторяет строку 5" in str(report.errors[-1])
@@ -0,0 +1,50 @@
+from datetime import datetime, time
+import openpyxl
+from modules.xlsx_reader import XlsxReader
+
+
+def _trimmed(rows):
+    """Строки без хвостовых пустых ячеек: openpyxl дополняет строки до ширины листа"""
+    result = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] is None:
+            row.pop()
+        result.append(tuple(row))
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+
+def _assert_same_values(path):
+    expected = openpyxl.load_workbook(path, data_only=True)
+    with XlsxReader(path) as book:
+        assert book.sheetnames == expected.sheetnames
+        for name in book.sheetnames:
+            actual = _trimmed(book.iter_rows(name))
+            wanted = _trimmed(expected[name].iter_rows(values_only=True))
+            assert actual == wanted, name
+            assert [list(map(type, row)) for row in actual] == [list(map(type, row)) for row in wanted], name
+
+
+def test_register_values_match_openpyxl(register_path):
+    _assert_same_values(register_path)
+
+
+def test_value_types_gaps_and_1904_dates(tmp_path):
+    for date1904 in (False, True):
+        wb = openpyxl.Workbook()
+        wb.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904 if date1904 else openpyxl.utils.datetime.CALENDAR_WINDOWS_1900
+        ws = wb.active
+        ws.title = "Данные"
+        ws.append(["текст", 1, 2.5, True, datetime(2024, 3, 1, 12, 30)])
+        ws["B3"] = "после пропущенной строки"
+        ws["F3"] = time(8, 15)
+        ws["A5"] = 45000
+        ws["A5"].number_format = "dd.mm.yyyy"
+        ws["C5"] = "повтор"
+        ws["D5"] = "текст"
+        wb.create_sheet("Пустой")
+        path = tmp_path / f"types_{int(date1904)}.xlsx"
+        wb.save(path)
+        _assert_same_values(path)
@@ -1,6 +1,61 @@
+import sys
 import openpyxl
-from openpyxl.styles import Font, Alignment
-from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from modules.act_files import act_file_name
+from modules.file_manager import FileManager
+from modules.fill_plan import FillPlan, fill_plan_path, merged_bounds
+from modules.records import ActRecord, ColumnMap, Organization, Person, parse_date
+from modules.register import RegisterReader
+from modules.template import anchor_index
+
+def act_register_data(act):
+    """Данные акта для заполнения шаблона из записи реестра (ActRecord)"""
+    return {
+        'akt_number': f"{act.suffix}-{act.number}",  # Суффикс + Номер
+        'works': act.work_name,
+        'start_date': act.start_date,
+        'end_date': act.end_date,
+        'akt_date': act.act_date,
+        'next_works': act.next_works,
+        'materials': act.materials,
+        'shemi': act.schemes,
+        'project_docs': f"{act.project}, лист {act.project_sheet}",  # Проект + лист
+        'regulations': act.normatives,
+        'notes': act.notes,
+        'customer_rep': act.customer_rep,
+        'contractor_rep': act.general_contractor_rep,  # Предст. генподрядчика
+        'tech_supervisor': act.supervisor_rep,
+        'designer_rep': act.designer_rep,
+        'executor_rep': act.contractor_rep  # Исполнитель работ
+    }
+
+def person_data(person):
+    """Данные персоналии из записи реестра (Person)"""
+    return {
+        'id': person.id,
+        'fio': person.name,
+        'position': person.position,
+        'org': person.organization,
+        'role': person.role,
+        'phone': person.phone,
+        'nrs': person.nrs,
+        'order': person.order,
+        'valid_from': person.active_from
+    }
+
+def org_data(org):
+    """Данные организации из записи реестра (Organization)"""
+    return {
+        'id': org.id,
+        'type': org.type,
+        'name': org.name,
+        'ogrn': org.ogrn,
+        'inn': org.inn,
+        'address': org.address,
+        'phone': org.phone,
+        'sro': org.sro
+    }
 
 def get_register_data(register_path, akt_id):
     """
@@ -13,36 +68,45 @@ def get_register_data(register_path, akt_id):
     try:
         wb = openpyxl.load_workbook(register_path)
         ws = wb["Реестр актов"]
+        rows = ws.iter_rows(values_only=True)
+        
+        # Столбцы определяются по заголовкам, как в ActProcessor
+        columns = ColumnMap(ActRecord, next(rows, ()), ws.title)
+        id_column = columns.indexes['act_id']
         
         # Находим строку с нужным актом
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row[0] == akt_id:  # ID акта в первом столбце
+        for row in rows:
+            if id_column < len(row) and row[id_column] == akt_id:
                 # Собираем данные из строки реестра
-                data = {
-                    'akt_number': f"{row[1]}-{row[2]}",  # Суффикс + Номер
-                    'works': row[3],  # Наименование работ
-                    'start_date': row[4],  # Дата начала
-                    'end_date': row[5],  # Дата окончания
-                    'akt_date': row[6],  # Дата акта
-                    'next_works': row[7],  # Последующие работы
-                    'materials': row[8],  # Материалы
-                    'shemi': row[9],  # Исп. схемы
-                    'project_docs': f"{row[10]}, лист {row[11]}",  # Проект + лист
-                    'regulations': row[12],  # Нормативные документы
-                    'notes': row[14],  # Примечания
-                    'customer_rep': row[15],  # Предст. заказчика
-                    'contractor_rep': row[16],  # Предст. генподрядчика
-                    'tech_supervisor': row[17],  # Технадзор
-                    'designer_rep': row[18],  # Проектировщик
-                    'executor_rep': row[19]  # Исполнитель работ
-                }
-                return data
+                return act_register_data(columns.make(row))
         return None
         
     except Exception as e:
         print(f"Ошибка при чтении реестра: {str(e)}")
         return None
 
+def act_values(register_data, persons, orgs_data):
+    """Значения полей формы: данные акта, организация и представитель заказчика
+
+    :param persons: Данные персоналий по ID
+    """
+    # Организация и представитель заказчика берутся из справочников
+    customer_org = next((org for org in orgs_data if org['type'] == 'Заказчик'), None)
+    if customer_org:
+        customer_org = f"{customer_org['name']}, ОГРН {customer_org['ogrn']}, ИНН {customer_org['inn']}, {customer_org['address']}"
+    customer_person = persons.get(register_data['customer_rep'])
+    
+    # Даты уже разобраны схемой реестра; строки допускаются для данных из других источников
+    return dict(
+        register_data,
+        akt_date=parse_date(register_data['akt_date']),
+        start_date=parse_date(register_data['start_date']),
+        end_date=parse_date(register_data['end_date']),
+        project_name="Объект капитального строительства",  # Должно браться из других данных
+        customer_org=customer_org,
+        customer_fio=customer_person['fio'] if customer_person else None,
+    )
+
 def fill_aosr_template(template_path, output_path, register_data, persons_data, orgs_data):
     """
     Заполняет шаблон АОСР данными из реестра
@@ -59,50 +123,11 @@ def fill_aosr_template(template_path, output_path, register_data, persons_data,
         wb = openpyxl.load_workbook(template_path)
         ws = wb.worksheets[0]
         
-        # Парсим даты
-        akt_date = datetime.strptime(register_data['akt_date'], "%d.%m.%Y")
-        start_date = datetime.strptime(register_data['start_date'], "%d.%m.%Y")
-        end_date = datetime.strptime(register_data['end_date'], "%d.%m.%Y")
+        values = act_values(register_data, {person['id']: person for person in persons_data}, orgs_data)
         
-        # Основные данные объекта (пример, нужно адаптировать под вашу структуру)
-        project_name = "Объект капитального строительства"  # Должно браться из других данных
-        ws['D6'] = project_name
-        
-        # Данные организаций (пример)
-        customer_org = next((org for org in orgs_data if org['type'] == 'Заказчик'), None)
-        if customer_org:
-            ws['D9'] = f"{customer_org['name']}, ОГРН {customer_org['ogrn']}, ИНН {customer_org['inn']}, {customer_org['address']}"
-        
-        # Данные акта из реестра
-        ws['C75'] = register_data['akt_number']
-        ws['X75'] = akt_date.day
-        ws['AB75'] = akt_date.month
-        ws['AF75'] = akt_date.year
-        
-        # Работы и материалы
-        ws['D87'] = register_data['works']
-        ws['D91'] = register_data['project_docs']
-        ws['P95'] = register_data['materials']
-        ws['G101'] = register_data['shemi']
-        
-        # Даты работ
-        ws['L107'] = start_date.day
-        ws['P107'] = start_date.month
-        ws['T107'] = start_date.year
-        ws['L108'] = end_date.day
-        ws['P108'] = end_date.month
-        ws['T108'] = end_date.year
-        
-        # Нормативные документы и последующие работы
-        ws['D112'] = register_data['regulations']
-        ws['D118'] = register_data['next_works']
-        ws['K122'] = register_data['notes']
-        ws['H124'] = "3"  # Количество экземпляров
-        
-        # Подписи (пример, нужно адаптировать под вашу структуру)
-        customer_person = next((p for p in persons_data if p['id'] == register_data['customer_rep']), None)
-        if customer_person:
-            ws['D137'] = customer_person['fio']
+        # Ячейки формы описаны в файле разметки шаблона (aosr-prikaz-344.fill.json)
+        plan = FillPlan.load(fill_plan_path(template_path), anchor_index(merged_bounds(ws)), accessor=itemgetter)
+        plan.fill(ws, values)
         
         # Сохраняем заполненный файл
         wb.save(output_path)
@@ -119,20 +144,14 @@ def get_persons_data(register_path):
         wb = openpyxl.load_workbook(register_path)
         ws = wb["Персоналии"]
         
+        rows = ws.iter_rows(values_only=True)
+        columns = ColumnMap(Person, next(rows, ()), ws.title)
+        
         persons = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Если есть ID
-                persons.append({
-                    'id': row[0],
-                    'fio': row[1],
-                    'position': row[2],
-                    'org': row[3],
-                    'role': row[4],
-                    'phone': row[5],
-                    'nrs': row[6],
-                    'order': row[7],
-                    'valid_from': row[8]
-                })
+        for row in rows:
+            person = columns.make(row)
+            if person.id:  # Если есть ID
+                persons.append(person_data(person))
         return persons
         
     except Exception as e:
@@ -145,31 +164,104 @@ def get_orgs_data(register_path):
         wb = openpyxl.load_workbook(register_path)
         ws = wb["Организации"]
         
+        rows = ws.iter_rows(values_only=True)
+        columns = ColumnMap(Organization, next(rows, ()), ws.title)
+        
         orgs = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row[0]:  # Если есть ID
-                orgs.append({
-                    'id': row[0],
-                    'type': row[1],
-                    'name': row[2],
-                    'ogrn': row[3],
-                    'inn': row[4],
-                    'address': row[5],
-                    'phone': row[6],
-                    'sro': row[7]
-                })
+        for row in rows:
+            org = columns.make(row)
+            if org.id:  # Если есть ID
+                orgs.append(org_data(org))
         return orgs
         
     except Exception as e:
         print(f"Ошибка при чтении организаций: {str(e)}")
         return []
 
+def fill_aosr_batch(template_path, output_dir, register_path, akt_ids="all"):
+    """
+    Заполняет шаблон АОСР для нескольких актов за одно чтение реестра
+    
+    Реестр открывается один раз и из него читаются только листы актов,
+    персоналий и организаций; акты ищутся по индексу ID (при повторе ID -
+    первая строка, как в get_register_data), шаблон загружается один раз:
+    перед каждым актом ячейкам разметки возвращаются значения шаблона.
+    
+    :param template_path: Путь к шаблону
+    :param output_dir: Папка для файлов актов ("Акт <ID>.xlsx")
+    :param register_path: Путь к файлу реестра
+    :param akt_ids: Список ID актов или "all" - все акты реестра
+    :return: Словарь с созданными файлами, ненайденными ID и статусом
+    """
+    try:
+        register = RegisterReader().read(register_path, sheets=('Реестр актов', 'Персоналии', 'Организации'))
+        index = {}
+        for act in register.rows:
+            index.setdefault(act.act_id, act)
+        if akt_ids == "all":
+            akt_ids = list(index)
+        persons = {person.id: person_data(person) for person in register.personnel.values()}
+        orgs_data = [org_data(org) for org in register.organizations.values()]
+        
+        wb = openpyxl.load_workbook(template_path)
+        ws = wb.worksheets[0]
+        plan = FillPlan.load(fill_plan_path(template_path), anchor_index(merged_bounds(ws)), accessor=itemgetter)
+        originals = {(row, column): ws.cell(row=row, column=column).value for row, column in plan.targets()}
+    
+    except Exception as e:
+        print(f"Ошибка при подготовке заполнения: {str(e)}")
+        return {'dir': output_dir, 'error': str(e), 'status': 'error'}
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    file_manager = FileManager()
+    files = []
+    missing = []
+    used = set()
+    for akt_id in akt_ids:
+        act = index.get(akt_id)
+        if act is None:
+            print(f"Акт с ID {akt_id} не найден в реестре!")
+            missing.append(akt_id)
+            continue
+        
+        try:
+            # Значения прошлого акта стираются: ячейки без данных остаются как в шаблоне
+            for (row, column), value in originals.items():
+                ws.cell(row=row, column=column).value = value
+            plan.fill(ws, act_values(act_register_data(act), persons, orgs_data))
+            
+            output_path = output_dir / act_file_name(akt_id, used)
+            file_manager.save_workbook_safe(wb, output_path)
+            files.append(output_path)
+            print(f"Акт успешно создан: {output_path}")
+        
+        except Exception as e:
+            print(f"Ошибка при заполнении акта {akt_id}: {str(e)}")
+    
+    return {
+        'dir': output_dir,
+        'files': files,
+        'missing': missing,
+        'total': len(akt_ids),
+        'success': len(files),
+        'status': 'success'
+    }
+
 if __name__ == "__main__":
     # Пути к файлам
     register_path = "Реестр_АОСР_финальный.xlsx"
     template_path = "aosr-prikaz-344.xls"
     output_path = "АОСР_заполненный.xls"
     
+    # ID актов из командной строки (несколько ID или all) заполняются пакетом в папку
+    if len(sys.argv) > 1:
+        akt_ids = "all" if sys.argv[1:] == ["all"] else sys.argv[1:]
+        result = fill_aosr_batch(template_path, "АОСР_заполненные", register_path, akt_ids)
+        if result['status'] == 'success':
+            print(f"Создано актов: {result['success']} из {result['total']}")
+        sys.exit(0 if result['status'] == 'success' else 1)
+    
     # ID акта для заполнения (можно ввести с клавиатуры)
     akt_id = "АСР-2023-001"
     
@@ -217,5 +309,7 @@ get_persons_data() и get_orgs_data() - получают информацию о
 Укажите правильные пути к файлам
 Задайте ID акта, который нужно заполнить
 Запустите скрипт - результат сохранится в указанный файл
-Скрипт можно доработать для автоматического определения ID акта или пакетной обработки нескольких актов.
+Для пакетной обработки передайте ID актов или all в командной строке
+(fill_aosr_batch): реестр и шаблон загружаются один раз, файлы актов
+сохраняются в папку АОСР_заполненные.
     """
\ No newline at end of file
@@ -38,10 +38,27 @@ def add_dropdown_list(worksheet, cell_range, source, prompt_title="", prompt_tex
         for cell in row:
             cell.style = 'Input'
 
-def create_aosr_register(output_file):
+def create_aosr_register(output_file, acts_count=10, orgs_count=10, persons_per_role=2,
+                         certs_count=15, normatives_count=10, dates_as_text=True, verbose=True):
     """
     Создает реестр актов скрытых работ с полной структурой таблиц
+    
+    :param output_file: Путь к сохраняемому файлу
+    :param acts_count: Число актов в реестре
+    :param orgs_count: Число организаций
+    :param persons_per_role: Число представителей на каждую причастность
+    :param certs_count: Число сертификатов
+    :param normatives_count: Число нормативных документов
+    :param dates_as_text: Даты актов и полномочий строками "дд.мм.гггг" (иначе ячейками даты)
+    :param verbose: Выводить инструкцию по проверке
+    
+    Первые записи справочников - демонстрационные данные, недостающие
+    достраиваются по тем же образцам, поэтому с параметрами по умолчанию
+    создается прежний демонстрационный реестр.
     """
+    def as_date(text):
+        return text if dates_as_text else datetime.strptime(text, "%d.%m.%Y")
+    
     try:
         # Создаем новую книгу Excel
         wb = openpyxl.Workbook()
@@ -85,6 +102,12 @@ def create_aosr_register(output_file):
             ["CERT-014", "СТ-РУ-014", "Лак паркетный", "ООО ДеревоПродукт", "01.04.2023", "01.04.2026"],
             ["CERT-015", "СТ-РУ-015", "Плиты перекрытия", "ООО ЖБИ", "10.04.2023", "10.04.2026"]
         ]
+        certs_data = certs_data[:certs_count]
+        for i in range(len(certs_data) + 1, certs_count + 1):
+            material, producer = certs_data[(i - 1) % 15][2:4]
+            issued = datetime(2023, 1, 1) + timedelta(days=i % 365)
+            certs_data.append([f"CERT-{i:03d}", f"СТ-РУ-{i:03d}", material, producer,
+                               issued.strftime("%d.%m.%Y"), issued.replace(year=2026).strftime("%d.%m.%Y")])
         
         for cert in certs_data:
             ws_certs.append(cert)
@@ -127,6 +150,12 @@ def create_aosr_register(output_file):
             ["ORG-010", "Подрядчик", "ООО ОмегаСтрой", "1257746543219", "7790123456",
              "г.Москва, ул. Омега, д.5", "+7(495)901-23-45", "СРО-567"]
         ]
+        orgs_data = orgs_data[:orgs_count]
+        org_types = ["Заказчик", "Генподрядчик", "Проектировщик", "Подрядчик", "Технадзор"]
+        for i in range(len(orgs_data) + 1, orgs_count + 1):
+            orgs_data.append([f"ORG-{i:03d}", org_types[(i - 1) % len(org_types)], f"ООО Организация {i}",
+                              f"{1280000000000 + i}", f"{7800000000 + i}",
+                              f"г.Москва, ул. Строительная, д.{i}", f"+7(495){i % 1000:03d}-00-00", f"СРО-{i:03d}"])
         
         for org in orgs_data:
             ws_orgs.append(org)
@@ -167,9 +196,21 @@ def create_aosr_register(output_file):
             ["PERS-ИСП-02", "Дмитриев Д.Д.", "Мастер", "ООО АльфаСтрой", "Исполнитель работ", 
              "+7(495)000-00-00", "НРС-010", "Приказ №10", "01.10.2023"]
         ]
+        # Дополнительные представители по каждой причастности - в организациях нужного типа
+        roles = [("ЗАК", "Заказчик", "Заказчик"), ("ГЕН", "Генподрядчик", "Генподрядчик"),
+                 ("ТЕХ", "Технадзор", "Технадзор"), ("ПРО", "Проектировщик", "Проектировщик"),
+                 ("ИСП", "Исполнитель работ", "Подрядчик")]
+        persons_data = [person for person in persons_data if int(person[0][-2:]) <= persons_per_role]
+        for code, role, org_type in roles:
+            role_orgs = [org[2] for org in orgs_data if org[1] == org_type] or [orgs_data[0][2]]
+            for k in range(3, persons_per_role + 1):
+                number = len(persons_data) + 1
+                persons_data.append([f"PERS-{code}-{k:02d}", f"Сотрудник {number}", "Инженер",
+                                     role_orgs[k % len(role_orgs)], role, f"+7(495){number % 1000:03d}-11-11",
+                                     f"НРС-{number:03d}", f"Приказ №{number}", "01.01.2023"])
         
         for person in persons_data:
-            ws_persons.append(person)
+            ws_persons.append(person[:8] + [as_date(person[8])])
         
         # Создаем таблицу для персоналий
         persons_table = Table(displayName="Персоналии", ref=f"A1:{get_column_letter(len(persons_headers))}{len(persons_data)+1}")
@@ -189,25 +230,28 @@ def create_aosr_register(output_file):
         ]
         ws_register.append(register_headers)
         
-        # Тестовые данные актов (10 строк)
+        # Тестовые данные актов
         start_date = datetime(2023, 1, 1)
         act_data = []
-        for i in range(1, 11):
+        for i in range(1, acts_count + 1):
             act_id = f"АСР-2023-{i:03d}"
-            materials = f"CERT-{i:03d}; CERT-{(i%15)+1:03d}"
+            materials = f"CERT-{(i-1)%certs_count+1:03d}; CERT-{i%certs_count+1:03d}"
             
-            start = start_date + timedelta(days=(i-1)*10)
+            # Даты идут по кругу в пределах трех лет, представители меняются каждую тысячу актов
+            start = start_date + timedelta(days=((i-1) % 100)*10)
             end = start + timedelta(days=5)
             act_date = end + timedelta(days=1)
+            person = (i - 1) // 1000 % persons_per_role + 1
             
             act_data.append([
                 act_id, "АСР", str(i), f"Работы по объекту {i}",
-                start.strftime("%d.%m.%Y"), end.strftime("%d.%m.%Y"), act_date.strftime("%d.%m.%Y"),
-                f"Работы по объекту {i+1}" if i < 10 else "Заключительные работы",
+                as_date(start.strftime("%d.%m.%Y")), as_date(end.strftime("%d.%m.%Y")),
+                as_date(act_date.strftime("%d.%m.%Y")),
+                f"Работы по объекту {i+1}" if i < acts_count else "Заключительные работы",
                 materials, f"Схема {i}", f"Проект-{i}",
                 f"Лист {i}", "СП 48.13330.2019; СП 70.13330.2012",
                 "Черновик", f"Примечание к акту {i}",
-                "PERS-ЗАК-01", "PERS-ГЕН-01", "PERS-ТЕХ-01", "PERS-ПРО-01", "PERS-ИСП-01"
+                *(f"PERS-{code}-{person:02d}" for code, _, _ in roles)
             ])
         
         for act in act_data:
@@ -239,6 +283,9 @@ def create_aosr_register(output_file):
             ["СП 64.13330.2017", "Деревянные конструкции", "СП", "Актуальный"],
             ["СП 17.13330.2017", "Кровли", "СП", "Актуальный"]
         ]
+        regulations_data = regulations_data[:normatives_count]
+        for i in range(len(regulations_data) + 1, normatives_count + 1):
+            regulations_data.append([f"СП {100 + i}.13330.2020", f"Свод правил {i}", "СП", "Актуальный"])
         
         for reg in regulations_data:
             ws_regulations.append(reg)
@@ -267,36 +314,40 @@ def create_aosr_register(output_file):
         # Добавляем выпадающие списки с помощью нашей функции
         
         # 1. Тип организации
+        orgs_end = len(orgs_data) + 1
+        persons_end = len(persons_data) + 1
+        acts_end = len(act_data) + 1
+        
         add_dropdown_list(
-            ws_orgs, 'B2:B11', '"Заказчик,Генподрядчик,Проектировщик,Подрядчик,Технадзор"',
+            ws_orgs, f'B2:B{orgs_end}', '"Заказчик,Генподрядчик,Проектировщик,Подрядчик,Технадзор"',
             "Выберите тип организации", "Пожалуйста, выберите тип организации из списка",
             "Неверный тип", "Выберите значение из списка"
         )
         
         # 2. Организация для персоналий
         add_dropdown_list(
-            ws_persons, 'D2:D11', '=Организации!$C$2:$C$11',
+            ws_persons, f'D2:D{persons_end}', f'=Организации!$C$2:$C${orgs_end}',
             "Выберите организацию", "Пожалуйста, выберите организацию из списка",
             "Неверная организация", "Выберите значение из списка"
         )
         
         # 3. Материалы в реестре актов
         add_dropdown_list(
-            ws_register, 'I2:I11', '=Сертификаты!$A$2:$A$16',
+            ws_register, f'I2:I{acts_end}', f'=Сертификаты!$A$2:$A${len(certs_data) + 1}',
             "Выберите материалы", "Пожалуйста, выберите материалы из списка",
             "Неверные материалы", "Выберите значение из списка"
         )
         
         # 4. Нормативные документы
         add_dropdown_list(
-            ws_register, 'M2:M11', '=Нормативы!$A$2:$A$11',
+            ws_register, f'M2:M{acts_end}', f'=Нормативы!$A$2:$A${len(regulations_data) + 1}',
             "Выберите нормативы", "Пожалуйста, выберите нормативные документы из списка",
             "Неверные нормативы", "Выберите значение из списка"
         )
         
         # 5. Статус акта
         add_dropdown_list(
-            ws_register, 'N2:N11', '"Черновик,На подписании,Подписан,Архив,Аннулирован"',
+            ws_register, f'N2:N{acts_end}', '"Черновик,На подписании,Подписан,Архив,Аннулирован"',
             "Выберите статус", "Пожалуйста, выберите статус акта из списка",
             "Неверный статус", "Выберите значение из списка"
         )
@@ -305,7 +356,7 @@ def create_aosr_register(output_file):
         for col, role in zip(['P', 'Q', 'R', 'S', 'T'], 
                             ['Заказчик', 'Генподрядчик', 'Технадзор', 'Проектировщик', 'Исполнитель работ']):
             add_dropdown_list(
-                ws_register, f'{col}2:{col}11', '=Персоналии!$A$2:$B$11',
+                ws_register, f'{col}2:{col}{acts_end}', f'=Персоналии!$A$2:$B${persons_end}',
                 f"Выберите представителя {role}", f"Пожалуйста, выберите представителя {role} из списка",
                 "Неверный выбор", "Выберите значение из списка"
             )
@@ -313,6 +364,8 @@ def create_aosr_register(output_file):
         # Сохраняем файл
         wb.save(output_file)
         print(f"\nРеестр успешно создан: {os.path.abspath(output_file)}")
+        if not verbose:
+            return True
         
         # Инструкция по проверке
         print("\nИнструкция по проверке выпадающих списков:")